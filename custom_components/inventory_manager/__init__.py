@@ -5,13 +5,13 @@ import logging
 from pathlib import Path
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.helpers import config_validation as cv
 
 from .const import DOMAIN
 from .const import DEFAULT_CATEGORIES, DEFAULT_ZONES, STORAGE_FREEZER, STORAGE_FRIDGE, STORAGE_PANTRY
-from .coordinator import InventoryCoordinator
+from .coordinator import InventoryCoordinator, get_storage_backend
 from .panel import async_setup_panel, async_remove_panel
 from .services import async_setup_services, async_unload_services
 
@@ -83,6 +83,16 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         "coordinator": coordinator,
     }
 
+    # Write pending (write-behind) changes before Home Assistant shuts down
+    async def _async_flush_on_stop(event: Event) -> None:
+        await coordinator.async_flush()
+
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_flush_on_stop)
+    )
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    entry.async_on_unload(coordinator.async_track_day_rollover())
+
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -96,6 +106,23 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply option changes; switch storage backend when it changes.
+
+    Categories and zones also live in the options and change often, so the
+    entry is only reloaded for a backend switch.
+    """
+    coordinator: InventoryCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    coordinator.async_update_history_size()
+    backend = get_storage_backend(entry)
+    if backend == coordinator.storage_backend:
+        return
+
+    _LOGGER.info("Switching storage backend from %s to %s", coordinator.storage_backend, backend)
+    await coordinator.async_migrate_storage(backend)
+    hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Unload platforms
@@ -108,7 +135,10 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         # Remove panel
         await async_remove_panel(hass)
         
-        # Remove data
+        # Write pending changes, then remove data
+        coordinator: InventoryCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+        await coordinator.async_flush()
+        await coordinator.async_close()
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
@@ -0,0 +1,105 @@
+"""Keyword matcher mapping Open Food Facts tags and product names to categories."""
+from __future__ import annotations
+
+import re
+
+from .const import CATEGORY_MAPPING
+
+DEFAULT_CATEGORY = "Autre"
+
+
+def _trie_pattern(keywords: list[str]) -> str:
+    """Return a regex matching the longest keyword at a position (keywords as a trie)."""
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy: a longer keyword is preferred over one of its prefixes
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class CategoryMatcher:
+    """Keyword tables of a location's categories, compiled once.
+
+    All keywords are compiled into a single trie-shaped pattern reporting, at
+    each position of the text, the longest keyword starting there. The other
+    keywords starting at that position are its prefixes, precomputed with the
+    index of their category, so one scan gives the same result (and precedence,
+    in the location's category order) as testing every keyword of
+    CATEGORY_MAPPING category after category.
+    """
+
+    def __init__(self, categories: list[str]) -> None:
+        """Compile the keyword tables of the given categories."""
+        self._categories = list(categories)
+        # Keyword -> index of the first category that lists it
+        keyword_category: dict[str, int] = {}
+        for index, category in enumerate(self._categories):
+            for keyword in CATEGORY_MAPPING.get(category, []):
+                if keyword:
+                    keyword_category.setdefault(keyword, index)
+        # Keyword -> (length, category index) of the keywords it starts with
+        self._prefixes: dict[str, list[tuple[int, int]]] = {
+            keyword: [
+                (len(prefix), prefix_category)
+                for prefix, prefix_category in keyword_category.items()
+                if keyword.startswith(prefix)
+            ]
+            for keyword in keyword_category
+        }
+        self._pattern = (
+            re.compile(f"(?=({_trie_pattern(list(keyword_category))}))")
+            if keyword_category
+            else None
+        )
+
+    def _search(self, text: str) -> tuple[int | None, int | None]:
+        """Return the best category index of the word pass and of the substring pass."""
+        best_word = best_substring = None
+        if self._pattern is None:
+            return None, None
+        size = len(text)
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            before = text[start - 1] if start else " "
+            for length, index in self._prefixes[match.group(1)]:
+                if best_substring is None or index < best_substring:
+                    best_substring = index
+                # The keyword follows ":" or "-", or is a whole space-separated word
+                if (best_word is None or index < best_word) and (
+                    before in ":-"
+                    or (before == " " and (start + length == size or text[start + length] == " "))
+                ):
+                    best_word = index
+        return best_word, best_substring
+
+    def match(self, categories_tags: list[str], product_name: str = "") -> str:
+        """Return the category of a product (DEFAULT_CATEGORY if nothing matches)."""
+        if categories_tags:
+            tags_str = " ".join(tag.lower() for tag in categories_tags)
+
+            # First pass: exact word matching for better precision,
+            # second pass: substring matching
+            best_word, best_substring = self._search(tags_str)
+            if best_word is not None:
+                return self._categories[best_word]
+            if best_substring is not None:
+                return self._categories[best_substring]
+
+        # If no match from tags, try to detect from product name
+        if product_name:
+            _, best_substring = self._search(product_name.lower())
+            if best_substring is not None:
+                return self._categories[best_substring]
+
+        return DEFAULT_CATEGORY
@@ -10,7 +10,30 @@ from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 
-from .const import DOMAIN
+from .const import (
+    CONF_EXPIRY_EVENT_MODE,
+    CONF_EXPIRY_EVENT_RATE,
+    CONF_HISTORY_SIZE,
+    CONF_PUBLISH_INTERVAL,
+    CONF_PUBLISH_MAX_DELAY,
+    CONF_SAVE_DELAY,
+    CONF_SAVE_MAX_DELAY,
+    CONF_STORAGE_BACKEND,
+    DEFAULT_EXPIRY_EVENT_MODE,
+    DEFAULT_EXPIRY_EVENT_RATE,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_PUBLISH_INTERVAL,
+    DEFAULT_PUBLISH_MAX_DELAY,
+    DEFAULT_SAVE_DELAY,
+    DEFAULT_SAVE_MAX_DELAY,
+    DEFAULT_STORAGE_BACKEND,
+    DOMAIN,
+    EXPIRY_EVENT_MODES,
+    STORAGE_BACKEND_JSON,
+    STORAGE_BACKEND_SQLITE,
+)
+
+STORAGE_BACKENDS = [STORAGE_BACKEND_JSON, STORAGE_BACKEND_SQLITE]
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,10 +59,13 @@ class InventoryManagerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 data=user_input,
             )
 
-        # Simplified form - just enable notifications
+        # Simplified form - notifications and storage backend
         data_schema = vol.Schema(
             {
                 vol.Optional("notify_expiry", default=True): bool,
+                vol.Optional(
+                    CONF_STORAGE_BACKEND, default=DEFAULT_STORAGE_BACKEND
+                ): vol.In(STORAGE_BACKENDS),
             }
         )
 
@@ -70,7 +96,10 @@ class InventoryManagerOptionsFlow(config_entries.OptionsFlow):
     ) -> FlowResult:
         """Manage the options."""
         if user_input is not None:
-            return self.async_create_entry(title="", data=user_input)
+            # Keep categories/zones stored in the same options dict
+            return self.async_create_entry(
+                title="", data={**self.config_entry.options, **user_input}
+            )
 
         return self.async_show_form(
             step_id="init",
@@ -80,6 +109,57 @@ class InventoryManagerOptionsFlow(config_entries.OptionsFlow):
                         "notify_expiry",
                         default=self.config_entry.options.get("notify_expiry", True),
                     ): bool,
+                    vol.Optional(
+                        CONF_SAVE_DELAY,
+                        default=self.config_entry.options.get(
+                            CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=300)),
+                    vol.Optional(
+                        CONF_SAVE_MAX_DELAY,
+                        default=self.config_entry.options.get(
+                            CONF_SAVE_MAX_DELAY, DEFAULT_SAVE_MAX_DELAY
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                    vol.Optional(
+                        CONF_STORAGE_BACKEND,
+                        default=self.config_entry.options.get(
+                            CONF_STORAGE_BACKEND,
+                            self.config_entry.data.get(
+                                CONF_STORAGE_BACKEND, DEFAULT_STORAGE_BACKEND
+                            ),
+                        ),
+                    ): vol.In(STORAGE_BACKENDS),
+                    vol.Optional(
+                        CONF_HISTORY_SIZE,
+                        default=self.config_entry.options.get(
+                            CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=1000)),
+                    vol.Optional(
+                        CONF_PUBLISH_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_PUBLISH_INTERVAL, DEFAULT_PUBLISH_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+                    vol.Optional(
+                        CONF_PUBLISH_MAX_DELAY,
+                        default=self.config_entry.options.get(
+                            CONF_PUBLISH_MAX_DELAY, DEFAULT_PUBLISH_MAX_DELAY
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=300)),
+                    vol.Optional(
+                        CONF_EXPIRY_EVENT_MODE,
+                        default=self.config_entry.options.get(
+                            CONF_EXPIRY_EVENT_MODE, DEFAULT_EXPIRY_EVENT_MODE
+                        ),
+                    ): vol.In(EXPIRY_EVENT_MODES),
+                    vol.Optional(
+                        CONF_EXPIRY_EVENT_RATE,
+                        default=self.config_entry.options.get(
+                            CONF_EXPIRY_EVENT_RATE, DEFAULT_EXPIRY_EVENT_RATE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=600)),
                 }
             ),
         )
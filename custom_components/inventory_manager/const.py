@@ -1,5 +1,4 @@
 """Constants for Inventory Manager integration."""
-from datetime import timedelta
 
 DOMAIN = "inventory_manager"
 PLATFORMS = ["sensor"]
@@ -15,9 +14,63 @@ STORAGE_LOCATIONS = {
     STORAGE_PANTRY: "Réserves",
 }
 
-# Default storage file
+# Single storage file used before sharding (migrated on first load)
 STORAGE_FILE = "inventory_data.json"
 
+# Storage directory: one shard file per location plus the history
+# (freezer.json, fridge.json, pantry.json, history.json)
+STORAGE_DIR = "inventory_data"
+
+# Append-only journal of mutations (in STORAGE_DIR), compacted into the
+# shards once it grows past one of these thresholds
+STORAGE_JOURNAL_FILE = "journal.jsonl"
+JOURNAL_MAX_RECORDS = 1000
+JOURNAL_MAX_BYTES = 512 * 1024
+
+# Expiry notifications already sent (in STORAGE_DIR, whatever the backend)
+STORAGE_NOTIFICATIONS_FILE = "notifications.json"
+
+# Storage backend: JSON files (default) or SQLite database
+CONF_STORAGE_BACKEND = "storage_backend"
+STORAGE_BACKEND_JSON = "json"
+STORAGE_BACKEND_SQLITE = "sqlite"
+DEFAULT_STORAGE_BACKEND = STORAGE_BACKEND_JSON
+STORAGE_DB_FILE = "inventory_data.db"
+
+# Previous versions kept for each shard (fridge.json.1, .2, ...) to recover
+# from a corrupted file
+STORAGE_GENERATIONS = 3
+
+# Write-behind storage: a burst of mutations is written once, SAVE_DELAY seconds
+# after the last change, and never later than SAVE_MAX_DELAY after the first one.
+CONF_SAVE_DELAY = "save_delay"
+CONF_SAVE_MAX_DELAY = "save_max_delay"
+DEFAULT_SAVE_DELAY = 2
+DEFAULT_SAVE_MAX_DELAY = 30
+
+# Sensor updates: a change arriving PUBLISH_INTERVAL seconds after the previous
+# update is shown at once; a burst (scanning session) is published once it
+# pauses for PUBLISH_INTERVAL, and never later than PUBLISH_MAX_DELAY after
+# its first change.
+CONF_PUBLISH_INTERVAL = "publish_interval"
+CONF_PUBLISH_MAX_DELAY = "publish_max_delay"
+DEFAULT_PUBLISH_INTERVAL = 1.0
+DEFAULT_PUBLISH_MAX_DELAY = 5.0
+
+# Above this many products, a bulk operation rebuilds the sensor snapshot once
+# instead of applying one delta per product
+BULK_SNAPSHOT_REBUILD = 50
+
+# Products serialized per executor job when streaming the export file
+EXPORT_BATCH_SIZE = 500
+
+# Product history (autocomplete): most recently added names, one entry per name
+CONF_HISTORY_SIZE = "history_size"
+DEFAULT_HISTORY_SIZE = 100
+
+# Memo of mapped categories (same barcodes are scanned again and again)
+CATEGORY_CACHE_SIZE = 512
+
 # Barcode API
 OPENFOODFACTS_API_URL = "https://world.openfoodfacts.org/api/v2/product/{barcode}.json"
 
@@ -26,16 +79,36 @@ EXPIRY_THRESHOLD_URGENT = 3  # Rappel d'utilisation le jour même si < 3 jours
 EXPIRY_THRESHOLD_SOON = 5    # 1 jour avant si 3-5 jours
 EXPIRY_THRESHOLD_NORMAL = 7  # 2 jours avant si >= 7 jours
 
-# Update interval
-SCAN_INTERVAL = timedelta(hours=1)
+# Expiry events: one event per product (historical payload), one batched
+# event per check grouping the products by notification type and location,
+# or both. Per-product events can be limited to a number per minute (0 = no
+# limit); the others are queued, not dropped.
+CONF_EXPIRY_EVENT_MODE = "expiry_event_mode"
+EXPIRY_EVENT_MODE_PER_PRODUCT = "per_product"
+EXPIRY_EVENT_MODE_BATCHED = "batched"
+EXPIRY_EVENT_MODE_BOTH = "both"
+EXPIRY_EVENT_MODES = [
+    EXPIRY_EVENT_MODE_PER_PRODUCT,
+    EXPIRY_EVENT_MODE_BATCHED,
+    EXPIRY_EVENT_MODE_BOTH,
+]
+DEFAULT_EXPIRY_EVENT_MODE = EXPIRY_EVENT_MODE_PER_PRODUCT
+CONF_EXPIRY_EVENT_RATE = "expiry_event_rate"
+DEFAULT_EXPIRY_EVENT_RATE = 0
+
+# Products listed by the "expiring soon" sensor (days from today)
+EXPIRING_SOON_DAYS = 7
 
 # Services
 SERVICE_SCAN_PRODUCT = "scan_product"
 SERVICE_LOOKUP_PRODUCT = "lookup_product"
 SERVICE_ADD_PRODUCT = "add_product"
+SERVICE_ADD_PRODUCTS = "add_products"
 SERVICE_REMOVE_PRODUCT = "remove_product"
+SERVICE_REMOVE_PRODUCTS = "remove_products"
 SERVICE_UPDATE_QUANTITY = "update_quantity"
 SERVICE_UPDATE_PRODUCT = "update_product"
+SERVICE_UPDATE_PRODUCTS = "update_products"
 SERVICE_LIST_PRODUCTS = "list_products"
 SERVICE_ADD_CATEGORY = "add_category"
 SERVICE_REMOVE_CATEGORY = "remove_category"
@@ -47,6 +120,7 @@ SERVICE_RENAME_ZONE = "rename_zone"
 SERVICE_RESET_ZONES = "reset_zones"
 SERVICE_EXPORT_DATA = "export_data"
 SERVICE_IMPORT_DATA = "import_data"
+SERVICE_BATCH = "batch"
 
 # Attributes
 ATTR_BARCODE = "barcode"
@@ -63,6 +137,39 @@ ATTR_ZONE = "zone"
 ATTR_ADDED_DATE = "added_date"
 ATTR_OLD_NAME = "old_name"
 ATTR_NEW_NAME = "new_name"
+ATTR_PRODUCTS = "products"
+ATTR_EXPIRED = "expired"
+ATTR_EXPIRY_FROM = "expiry_from"
+ATTR_EXPIRY_TO = "expiry_to"
+ATTR_CHANGES = "changes"
+ATTR_OPERATIONS = "operations"
+ATTR_OP = "op"
+ATTR_SORT_BY = "sort_by"
+ATTR_ORDER = "order"
+ATTR_LIMIT = "limit"
+ATTR_OFFSET = "offset"
+ATTR_CURSOR = "cursor"
+ATTR_FIELDS = "fields"
+
+# Sort keys and page size limit of the list_products service
+LIST_SORT_KEYS = ("expiry_date", "name", "added_date", "quantity")
+LIST_MAX_LIMIT = 1000
+
+# Operations of the batch service
+BATCH_OP_ADD = "add"
+BATCH_OP_UPDATE = "update"
+BATCH_OP_REMOVE = "remove"
+BATCH_OP_QUANTITY = "quantity"
+BATCH_OPERATIONS = (BATCH_OP_ADD, BATCH_OP_UPDATE, BATCH_OP_REMOVE, BATCH_OP_QUANTITY)
+# Fields an update operation may change
+BATCH_UPDATE_FIELDS = (
+    ATTR_NAME,
+    ATTR_EXPIRY_DATE,
+    ATTR_QUANTITY,
+    ATTR_CATEGORY,
+    ATTR_ZONE,
+    ATTR_LOCATION,
+)
 
 # Default categories by location (can be customized by user)
 DEFAULT_CATEGORIES = {
@@ -182,3 +289,4 @@ DEFAULT_ZONES = {
 EVENT_PRODUCT_ADDED = "inventory_manager_product_added"
 EVENT_PRODUCT_REMOVED = "inventory_manager_product_removed"
 EVENT_PRODUCT_EXPIRING = "inventory_manager_product_expiring"
+EVENT_PRODUCTS_EXPIRING = "inventory_manager_products_expiring"
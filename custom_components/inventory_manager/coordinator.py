@@ -2,17 +2,26 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import bisect
+import heapq
 import json
 import logging
+import time
 import uuid
+from collections import OrderedDict, deque
+from collections.abc import Iterable
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
 import aiohttp
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later, async_track_time_change
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import dt as dt_util
 
@@ -25,32 +34,167 @@ from .const import (
     ATTR_IMAGE_URL,
     ATTR_LOCATION,
     ATTR_NAME,
+    ATTR_OP,
     ATTR_PRODUCT_ID,
     ATTR_QUANTITY,
     ATTR_ZONE,
-    CATEGORY_MAPPING,
+    BATCH_OP_ADD,
+    BATCH_OP_QUANTITY,
+    BATCH_OP_REMOVE,
+    BATCH_UPDATE_FIELDS,
+    BULK_SNAPSHOT_REBUILD,
+    CATEGORY_CACHE_SIZE,
+    CONF_EXPIRY_EVENT_MODE,
+    CONF_EXPIRY_EVENT_RATE,
+    CONF_HISTORY_SIZE,
+    CONF_PUBLISH_INTERVAL,
+    CONF_PUBLISH_MAX_DELAY,
+    CONF_SAVE_DELAY,
+    CONF_SAVE_MAX_DELAY,
+    CONF_STORAGE_BACKEND,
     DEFAULT_CATEGORIES,
+    DEFAULT_EXPIRY_EVENT_MODE,
+    DEFAULT_EXPIRY_EVENT_RATE,
+    DEFAULT_HISTORY_SIZE,
+    DEFAULT_PUBLISH_INTERVAL,
+    DEFAULT_PUBLISH_MAX_DELAY,
+    DEFAULT_SAVE_DELAY,
+    DEFAULT_SAVE_MAX_DELAY,
+    DEFAULT_STORAGE_BACKEND,
     DEFAULT_ZONES,
     DOMAIN,
     EVENT_PRODUCT_ADDED,
     EVENT_PRODUCT_EXPIRING,
     EVENT_PRODUCT_REMOVED,
+    EVENT_PRODUCTS_EXPIRING,
+    EXPIRING_SOON_DAYS,
+    EXPIRY_EVENT_MODE_BATCHED,
+    EXPIRY_EVENT_MODE_PER_PRODUCT,
     EXPIRY_THRESHOLD_NORMAL,
-    EXPIRY_THRESHOLD_SOON,
     EXPIRY_THRESHOLD_URGENT,
+    JOURNAL_MAX_BYTES,
+    JOURNAL_MAX_RECORDS,
     OPENFOODFACTS_API_URL,
-    SCAN_INTERVAL,
+    STORAGE_BACKEND_JSON,
+    STORAGE_BACKEND_SQLITE,
+    STORAGE_DB_FILE,
+    STORAGE_DIR,
     STORAGE_FILE,
     STORAGE_FREEZER,
     STORAGE_FRIDGE,
+    STORAGE_GENERATIONS,
     STORAGE_LOCATIONS,
+    STORAGE_NOTIFICATIONS_FILE,
     STORAGE_PANTRY,
 )
+from .category_matcher import CategoryMatcher
+from .expiry_scheduler import ExpiryScheduler
+from .models import (
+    SLICE_EXPIRED,
+    SLICE_EXPIRING,
+    SLICE_TOTAL,
+    InventorySnapshot,
+    Product,
+    ProductEntry,
+    canonical_expiry,
+    entry_slices,
+    parse_expiry,
+    expired_slice,
+    location_slice,
+)
+from .storage import (
+    SHARD_HISTORY,
+    InventoryStore,
+    SqliteInventoryStore,
+    encode_record,
+    read_state_file,
+    shard_for_location,
+    write_state_file,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class InventoryCoordinator(DataUpdateCoordinator):
+class BatchOperationError(ValueError):
+    """A batch operation could not be applied (nothing of the batch was applied)."""
+
+    def __init__(self, step: int, message: str) -> None:
+        """Initialize the error with the index of the failing operation."""
+        super().__init__(message)
+        self.step = step
+
+
+def _sort_key(product: Product, product_id: str, sort_by: str) -> tuple:
+    """Return the sort key of a product: missing values last, then value, then ID."""
+    if sort_by == "expiry_date":
+        value = product.expiry_ordinal
+    else:
+        value = product.get(sort_by)
+        if sort_by == "name" and value is not None:
+            value = str(value).casefold()
+    if value is None:
+        return (True, 0 if sort_by == "quantity" else "", product_id)
+    return (False, value, product_id)
+
+
+# Types a cursor value may have for each sort key (besides None)
+_CURSOR_VALUE_TYPES: dict[str, tuple[type, ...]] = {
+    "expiry_date": (str,),
+    "name": (str,),
+    "added_date": (str,),
+    "quantity": (int, float),
+}
+
+
+def _encode_cursor(sort_by: str, descending: bool, value: Any, product_id: str) -> str:
+    """Return the opaque cursor of the page following a product."""
+    if sort_by == "expiry_date":
+        # Same form as the SQLite column, and None for an invalid date
+        value = canonical_expiry(value)
+    data = json.dumps([sort_by, descending, value, product_id], ensure_ascii=False)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def _decode_cursor(cursor: str, sort_by: str, descending: bool) -> tuple[Any, str]:
+    """Return the (sort value, product ID) a cursor resumes after.
+
+    Raises ValueError if the cursor is malformed, was made for another sort
+    or holds a value of the wrong type for the sort.
+    """
+    try:
+        cursor_sort, cursor_descending, value, product_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode())
+        )
+    except (ValueError, TypeError) as err:
+        raise ValueError("Curseur invalide") from err
+    if (cursor_sort, cursor_descending) != (sort_by, descending) or not isinstance(product_id, str):
+        raise ValueError("Curseur invalide")
+    if value is not None and (
+        isinstance(value, bool)
+        or not isinstance(value, _CURSOR_VALUE_TYPES[sort_by])
+        or (sort_by == "expiry_date" and canonical_expiry(value) != value)
+    ):
+        raise ValueError("Curseur invalide")
+    return value, product_id
+
+
+def _batch_changes(operation: dict[str, Any]) -> dict[str, Any]:
+    """Return the product fields changed by an update or quantity batch operation."""
+    changes = {key: operation[key] for key in BATCH_UPDATE_FIELDS if key in operation}
+    if ATTR_EXPIRY_DATE in changes:
+        changes[ATTR_EXPIRY_DATE] = changes[ATTR_EXPIRY_DATE] or None
+    return changes
+
+
+def get_storage_backend(entry: ConfigEntry) -> str:
+    """Return the storage backend selected in the options (or at setup)."""
+    return entry.options.get(
+        CONF_STORAGE_BACKEND,
+        entry.data.get(CONF_STORAGE_BACKEND, DEFAULT_STORAGE_BACKEND),
+    )
+
+
+class InventoryCoordinator(DataUpdateCoordinator[InventorySnapshot]):
     """Coordinator for managing inventory data."""
 
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -59,178 +203,807 @@ class InventoryCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=SCAN_INTERVAL,
+            # No polling: expiry buckets only change on mutations and at local
+            # midnight (see async_track_day_rollover)
+            update_interval=None,
         )
         self.entry = entry
-        self._storage_path = Path(hass.config.path(STORAGE_FILE))
-        self._products: dict[str, dict[str, Any]] = {}
-        self._product_history: list[dict[str, Any]] = []  # Historique des 100 derniers produits ajoutés
-        self._last_notification_check: datetime | None = None
+        self.storage_backend = get_storage_backend(entry)
+        self._store = self._create_store(self.storage_backend)
+        self._products: dict[str, Product] = {}
+        # Secondary indexes (ordered sets of product IDs), kept in sync by every
+        # mutation so lookups cost O(result) instead of a scan of all products
+        self._index_location: dict[str, dict[str, None]] = {}
+        self._index_category: dict[tuple[str, str], dict[str, None]] = {}
+        self._index_zone: dict[tuple[str, str], dict[str, None]] = {}
+        self._index_barcode: dict[str, dict[str, None]] = {}
+        # (expiry ordinal, product ID) sorted lists, globally and per location:
+        # expired / expiring queries are bisect range scans
+        self._index_expiry: list[tuple[int, str]] = []
+        self._index_expiry_location: dict[str, list[tuple[int, str]]] = {}
+        # Products without a (valid) expiry date, per location
+        self._index_undated: dict[str, dict[str, None]] = {}
+        # Snapshot derived from coordinator.data by the current mutation, or
+        # stale when it must be rebuilt from scratch (load, import, bulk changes)
+        self._next_snapshot: InventorySnapshot | None = None
+        self._snapshot_stale = True
+        # Coalesced sensor updates (see _async_publish)
+        self._publish_unsub: CALLBACK_TYPE | None = None
+        self._publish_pending_since: float | None = None
+        self._last_publish: float | None = None
+        self._publish_stats = {"requested": 0, "published": 0, "coalesced": 0}
+        # Sensor value/attribute memo counters, updated by the sensors
+        self.sensor_cache_stats = {"hits": 0, "misses": 0}
+        # Historique des derniers produits ajoutés, indexé par nom normalisé
+        # (du plus ancien au plus récent : un ajout déplace le nom en fin)
+        self._product_history: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # Bumped by every history change; product_history is cached per version
+        self._history_version = 0
+        self._history_list: tuple[int, list[dict[str, Any]]] | None = None
+        # Next expiry notification of each product, and those already sent
+        # (persisted so a restart does not notify them again)
+        self._expiry_scheduler = ExpiryScheduler()
+        self._notifications_path = Path(
+            hass.config.path(STORAGE_DIR, STORAGE_NOTIFICATIONS_FILE)
+        )
+        # Per-product expiry events waiting for the rate limit, and the times
+        # of those fired during the last minute
+        self._expiry_event_queue: deque[dict[str, Any]] = deque()
+        self._expiry_event_times: deque[float] = deque()
+        self._expiry_event_unsub: CALLBACK_TYPE | None = None
+        # Write-behind state: mutations mark the data dirty and a single timer
+        # writes the whole burst once (see async_schedule_save).
+        self._save_lock = asyncio.Lock()
+        self._save_unsub: CALLBACK_TYPE | None = None
+        self._dirty_since: float | None = None
+        self._save_stats = {"requested": 0, "written": 0, "coalesced": 0}
+        # Journal lines waiting for the next write; bulk operations (import,
+        # reset) require a full snapshot instead.
+        self._pending_records: list[str] = []
+        self._snapshot_required = False
+        # Shards changed since the last compaction (only these are rewritten)
+        self._dirty_shards: set[str] = set()
+        # Compiled category keyword matchers: location -> (categories, matcher)
+        self._category_matchers: dict[str, tuple[tuple[str, ...], CategoryMatcher]] = {}
+        # LRU memo of mapped categories: (tags, product name, location) -> category
+        self._category_cache: OrderedDict[tuple, str] = OrderedDict()
+        self._category_cache_stats = {"hits": 0, "misses": 0}
 
     @property
-    def products(self) -> dict[str, dict[str, Any]]:
+    def products(self) -> dict[str, Product]:
         """Return all products."""
         return self._products
 
     @property
     def product_history(self) -> list[dict[str, Any]]:
-        """Return product history for autocomplete."""
-        return self._product_history
+        """Return product history for autocomplete (most recent first).
+
+        The list is built once per history change; callers must not modify it.
+        """
+        if self._history_list is None or self._history_list[0] != self._history_version:
+            self._history_list = (self._history_version, list(reversed(self._product_history.values())))
+        return self._history_list[1]
+
+    @property
+    def save_stats(self) -> dict[str, int]:
+        """Return write-behind counters (requested saves, actual writes, coalesced) and journal size."""
+        return {
+            **self._save_stats,
+            "journal_records": self._store.journal_records,
+            "journal_bytes": self._store.journal_bytes,
+        }
+
+    @property
+    def publish_stats(self) -> dict[str, int]:
+        """Return sensor update counters (requested, published, coalesced)."""
+        return dict(self._publish_stats)
+
+    @property
+    def category_cache_stats(self) -> dict[str, int]:
+        """Return the hit/miss counters of the category mapping memo."""
+        return {**self._category_cache_stats, "size": len(self._category_cache)}
+
+    @property
+    def expiry_notification_stats(self) -> dict[str, int]:
+        """Return the size of the expiry notification schedule."""
+        return self._expiry_scheduler.stats
+
+    @property
+    def invalid_expiry_count(self) -> int:
+        """Return the number of products whose expiry date could not be parsed."""
+        return sum(
+            1 for product in self._products.values()
+            if product.get("expiry_date") and product.expiry_ordinal is None
+        )
+
+    def _create_store(self, backend: str) -> InventoryStore | SqliteInventoryStore:
+        """Create the store for a storage backend."""
+        if backend == STORAGE_BACKEND_SQLITE:
+            return SqliteInventoryStore(
+                Path(self.hass.config.path(STORAGE_DB_FILE)), self.history_size
+            )
+        return InventoryStore(
+            Path(self.hass.config.path(STORAGE_DIR)),
+            Path(self.hass.config.path(STORAGE_FILE)),
+            max_records=JOURNAL_MAX_RECORDS,
+            max_bytes=JOURNAL_MAX_BYTES,
+            generations=STORAGE_GENERATIONS,
+        )
 
     async def async_load_data(self) -> None:
         """Load inventory data from storage."""
-        try:
-            if self._storage_path.exists():
-                data = await self.hass.async_add_executor_job(
-                    self._read_storage_file
+        if self.storage_backend == STORAGE_BACKEND_SQLITE:
+            try:
+                initialized = await self.hass.async_add_executor_job(
+                    self._store.is_initialized
                 )
-                self._products = data.get("products", {})
-                self._product_history = data.get("product_history", [])
-                _LOGGER.info("Loaded %d products and %d history items from storage", len(self._products), len(self._product_history))
+            except Exception as err:
+                _LOGGER.error("Error opening inventory database: %s", err)
+                initialized = True
+            if not initialized:
+                await self._async_migrate_from_json()
             else:
-                _LOGGER.info("No existing inventory file, starting fresh")
-                self._products = {}
-                self._product_history = []
+                await self._async_read_store()
+        else:
+            await self._async_read_store()
+        self._expiry_scheduler.load(
+            await self.hass.async_add_executor_job(read_state_file, self._notifications_path)
+        )
+        self._rebuild_indexes()
+        # Sensors read the snapshot as soon as they are added
+        self._async_publish_now()
+
+    async def _async_migrate_from_json(self) -> None:
+        """Populate a new SQLite database from the JSON files (one-shot)."""
+        sqlite_store = self._store
+        self._store = self._create_store(STORAGE_BACKEND_JSON)
+        await self._async_read_store()
+        self._store = sqlite_store
+        try:
+            await self.hass.async_add_executor_job(
+                sqlite_store.write_snapshot, self._snapshot_data(), []
+            )
+            _LOGGER.info(
+                "Migrated %d products and %d history items from the JSON files to SQLite",
+                len(self._products),
+                len(self._product_history),
+            )
         except Exception as err:
-            _LOGGER.error("Error loading inventory data: %s", err)
-            self._products = {}
-            self._product_history = []
-
-    def _read_storage_file(self) -> dict:
-        """Read storage file (blocking)."""
-        with open(self._storage_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+            _LOGGER.error("Error migrating inventory data to SQLite: %s", err)
 
-    async def async_save_data(self) -> None:
-        """Save inventory data to storage."""
+    async def async_migrate_storage(self, backend: str) -> None:
+        """Copy the current data into another storage backend (before switching to it)."""
+        await self.async_flush()
+        store = self._create_store(backend)
         try:
-            data = {
-                "products": self._products,
-                "product_history": self._product_history,
-                "last_updated": datetime.now().isoformat(),
-            }
             await self.hass.async_add_executor_job(
-                self._write_storage_file, data
+                store.write_snapshot, self._snapshot_data(), []
             )
-            _LOGGER.debug("Saved %d products to storage", len(self._products))
-        except Exception as err:
-            _LOGGER.error("Error saving inventory data: %s", err)
-
-    def _write_storage_file(self, data: dict) -> None:
-        """Write storage file (blocking)."""
-        with open(self._storage_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Update data and check for expiring products."""
-        await self._check_expiring_products()
-        return self._get_summary()
-
-    def _get_summary(self) -> dict[str, Any]:
-        """Get inventory summary."""
-        now = dt_util.now().date()
-        summary = {
-            "total_products": len(self._products),
-            "locations": {},
-            "expired": [],
-            "expiring_today": [],
-            "expiring_soon": [],
-        }
+            _LOGGER.info("Copied %d products to the %s storage backend", len(self._products), backend)
+        finally:
+            await self.hass.async_add_executor_job(store.close)
+
+    async def async_close(self) -> None:
+        """Release the storage backend."""
+        self._async_cancel_publish()
+        if self._expiry_event_unsub is not None:
+            self._expiry_event_unsub()
+            self._expiry_event_unsub = None
+        await self.hass.async_add_executor_job(self._store.close)
+
+    async def _async_read_store(self) -> None:
+        """Read the data from the current store (snapshot + journal replay)."""
+        try:
+            data = await self._store.async_load(self.hass)
+            if data is None:
+                if self._store.unreadable:
+                    _LOGGER.error(
+                        "No readable inventory snapshot (%s), starting with an empty inventory",
+                        ", ".join(self._store.unreadable),
+                    )
+                else:
+                    _LOGGER.info("No existing inventory file, starting fresh")
+                self._products = {}
+                self._set_history([])
+                return
 
-        for location in STORAGE_LOCATIONS:
-            location_products = [
-                p for p in self._products.values() 
-                if p.get("location") == location
-            ]
-            summary["locations"][location] = {
-                "count": len(location_products),
-                "products": location_products,
+            self._products = {
+                pid: Product.from_dict(product)
+                for pid, product in data.get("products", {}).items()
             }
+            self._set_history(data.get("product_history", []))
+
+            generation = self._store.loaded_generation
+            if self._store.incomplete:
+                _LOGGER.error(
+                    "Inventory files %s could not be fully recovered: no readable generation, "
+                    "or only one older than a full rewrite (generations %s)",
+                    self._store.incomplete,
+                    self._store.shard_generations,
+                )
+                self._require_snapshot()
+            elif self._store.unreadable:
+                _LOGGER.warning(
+                    "Current inventory files are unreadable, recovered from previous generations %s in %.1f ms",
+                    self._store.shard_generations,
+                    self._store.load_duration * 1000,
+                )
+                # Write fresh current files from the recovered data
+                self._require_snapshot()
+            elif self._store.migrated_legacy:
+                _LOGGER.info("Migrating %s to per-location files in %s", STORAGE_FILE, STORAGE_DIR)
+                self._require_snapshot()
+            _LOGGER.info(
+                "Loaded %d products and %d history items from storage "
+                "(generation %s, %d journal records replayed, %.1f ms)",
+                len(self._products),
+                len(self._product_history),
+                generation,
+                self._store.replayed_records,
+                self._store.load_duration * 1000,
+            )
+        except Exception as err:
+            _LOGGER.error("Error loading inventory data: %s", err)
+            self._products = {}
+            self._set_history([])
 
-        # Check expiry dates
-        for product_id, product in self._products.items():
-            expiry_str = product.get("expiry_date")
-            if not expiry_str:
-                continue
+    def _journal(self, record: dict[str, Any], location: str | None) -> None:
+        """Queue a mutation record for the journal and schedule a write.
 
-            try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                days_until_expiry = (expiry_date - now).days
+        `location` is the location of the product(s) the record changes, used
+        to mark its shard as dirty.
+        """
+        self._pending_records.append(encode_record(record))
+        self._dirty_shards.add(shard_for_location(location))
+        if "history" in record:
+            self._dirty_shards.add(SHARD_HISTORY)
+        self.async_schedule_save()
+
+    def _journal_product(self, op: str, product_id: str) -> None:
+        """Queue an add/update record carrying the full product."""
+        product = self._products[product_id]
+        self._journal(
+            {"op": op, "id": product_id, "product": product.to_dict()}, product.get("location")
+        )
 
-                product_info = {
-                    "id": product_id,
-                    "name": product.get("name", "Inconnu"),
-                    "expiry_date": expiry_str,
-                    "days_until_expiry": days_until_expiry,
-                    "location": product.get("location"),
-                }
+    def _require_snapshot(self) -> None:
+        """Rewrite the full snapshot on the next write (bulk changes).
 
-                if days_until_expiry < 0:
-                    summary["expired"].append(product_info)
-                elif days_until_expiry == 0:
-                    summary["expiring_today"].append(product_info)
-                elif days_until_expiry <= EXPIRY_THRESHOLD_SOON:
-                    summary["expiring_soon"].append(product_info)
-            except ValueError:
-                _LOGGER.warning("Invalid expiry date for product %s", product_id)
-
-        return summary
-
-    async def _check_expiring_products(self) -> None:
-        """Check for expiring products and send notifications."""
-        now = dt_util.now()
-        today = now.date()
-
-        # Only check once per 6 hours
-        if (
-            self._last_notification_check
-            and (now - self._last_notification_check).total_seconds() < 21600  # 6h
+        The pending records are dropped: the change itself is not journaled,
+        the store marks the full rewrite in the journal instead.
+        """
+        self._snapshot_required = True
+        self._pending_records = []
+        self.async_schedule_save()
+
+    @staticmethod
+    def _index_keys(product: Product) -> tuple:
+        """Return the indexed values of a product (location, category, zone, barcode, expiry)."""
+        return (
+            product.get("location"),
+            product.get("category"),
+            product.get("zone"),
+            product.get("barcode"),
+            product.expiry_ordinal,
+        )
+
+    @staticmethod
+    def _check_expiry(product_id: str, product: Product) -> None:
+        """Report an invalid expiry date once, when it is written."""
+        if product.get("expiry_date") and product.expiry_ordinal is None:
+            _LOGGER.warning(
+                "Invalid expiry date for product %s: %s", product_id, product.get("expiry_date")
+            )
+
+    def days_until_expiry(self, product_id: str) -> int | None:
+        """Return the number of days before a product expires (None if undated)."""
+        ordinal = self._products[product_id].expiry_ordinal
+        if ordinal is None:
+            return None
+        return ordinal - dt_util.now().date().toordinal()
+
+    def _index_add(self, product_id: str, keys: tuple, sort: bool = True) -> None:
+        """Add a product to the secondary indexes.
+
+        With sort=False the expiry lists are only appended to (the caller sorts
+        them once, see _rebuild_indexes).
+        """
+        location, category, zone, barcode, expiry = keys
+        self._index_location.setdefault(location, {})[product_id] = None
+        self._index_category.setdefault((location, category), {})[product_id] = None
+        self._index_zone.setdefault((location, zone), {})[product_id] = None
+        if barcode:
+            self._index_barcode.setdefault(barcode, {})[product_id] = None
+        if expiry is None:
+            self._index_undated.setdefault(location, {})[product_id] = None
+        elif sort:
+            entry = (expiry, product_id)
+            bisect.insort(self._index_expiry, entry)
+            bisect.insort(self._index_expiry_location.setdefault(location, []), entry)
+        else:
+            entry = (expiry, product_id)
+            self._index_expiry.append(entry)
+            self._index_expiry_location.setdefault(location, []).append(entry)
+
+    def _index_remove(self, product_id: str, keys: tuple) -> None:
+        """Remove a product from the secondary indexes."""
+        location, category, zone, barcode, expiry = keys
+        if expiry is not None:
+            entry = (expiry, product_id)
+            for entries in (self._index_expiry, self._index_expiry_location.get(location)):
+                if not entries:
+                    continue
+                pos = bisect.bisect_left(entries, entry)
+                if pos < len(entries) and entries[pos] == entry:
+                    del entries[pos]
+        for index, key in (
+            (self._index_location, location),
+            (self._index_category, (location, category)),
+            (self._index_zone, (location, zone)),
+            (self._index_barcode, barcode),
+            (self._index_undated, location if expiry is None else None),
         ):
+            ids = index.get(key)
+            if ids is None:
+                continue
+            ids.pop(product_id, None)
+            if not ids:
+                del index[key]
+
+    def _reindex(self, product_id: str, old_keys: tuple) -> None:
+        """Update the indexes after a product's indexed fields may have changed."""
+        new_keys = self._index_keys(self._products[product_id])
+        if new_keys != old_keys:
+            self._index_remove(product_id, old_keys)
+            self._index_add(product_id, new_keys)
+        if new_keys[4] != old_keys[4]:
+            self._expiry_scheduler.schedule(product_id, new_keys[4])
+        # The snapshot is ordered by location and expiry only
+        if (new_keys[0], new_keys[4]) != (old_keys[0], old_keys[4]):
+            self._snapshot_remove(product_id, old_keys)
+            self._snapshot_add(product_id)
+
+    def _editable_snapshot(self) -> InventorySnapshot | None:
+        """Return the snapshot the current mutation updates (None if stale)."""
+        if self._snapshot_stale or self.data is None:
+            return None
+        return self._next_snapshot or self.data
+
+    def _snapshot_add(self, product_id: str) -> None:
+        """Insert a product into the next snapshot."""
+        snapshot = self._editable_snapshot()
+        if snapshot is None:
             return
+        product = self._products[product_id]
+        ordinal = product.expiry_ordinal
+        days = None if ordinal is None else ordinal - snapshot.today
+        self._next_snapshot = snapshot.with_entry(
+            product.get("location"), (days, product_id, product)
+        )
 
-        self._last_notification_check = now
-        _LOGGER.info("Checking for expiring products...")
+    def _snapshot_remove(self, product_id: str, keys: tuple) -> None:
+        """Remove a product (with its indexed values before the change) from the next snapshot."""
+        snapshot = self._editable_snapshot()
+        if snapshot is None:
+            return
+        location, ordinal = keys[0], keys[4]
+        days = None if ordinal is None else ordinal - snapshot.today
+        self._next_snapshot = snapshot.without_entry(location, days, product_id)
+
+    def _snapshot_touch(self, product_id: str) -> None:
+        """Mark the slices listing a product changed in place (quantity, name...)."""
+        snapshot = self._editable_snapshot()
+        if snapshot is None:
+            return
+        product = self._products[product_id]
+        ordinal = product.expiry_ordinal
+        days = None if ordinal is None else ordinal - snapshot.today
+        self._next_snapshot = snapshot.touch(entry_slices(product.get("location"), days))
+
+    def _snapshot_touch_location(self, location: str) -> None:
+        """Mark the products slice of a location changed (categories, zones)."""
+        snapshot = self._editable_snapshot()
+        if snapshot is not None:
+            self._next_snapshot = snapshot.touch([location_slice(location)])
+
+    @callback
+    def _async_publish(self) -> None:
+        """Publish a mutation to the sensors, coalescing bursts.
+
+        A change arriving `publish_interval` seconds after the previous
+        publication is published at once. During a burst (scanning session),
+        the changes accumulate in the next snapshot and are published once the
+        burst pauses for `publish_interval` seconds, but never later than
+        `publish_max_delay` seconds after the first unpublished change.
+        """
+        now = time.monotonic()
+        self._publish_stats["requested"] += 1
+        interval = self.entry.options.get(CONF_PUBLISH_INTERVAL, DEFAULT_PUBLISH_INTERVAL)
+        if self._publish_pending_since is None and (
+            self._last_publish is None or now - self._last_publish >= interval
+        ):
+            self._async_publish_now()
+            return
 
+        if self._publish_pending_since is None:
+            self._publish_pending_since = now
+        else:
+            self._publish_stats["coalesced"] += 1
+        if self._publish_unsub is not None:
+            self._publish_unsub()
+        max_delay = self.entry.options.get(CONF_PUBLISH_MAX_DELAY, DEFAULT_PUBLISH_MAX_DELAY)
+        delay = min(interval, max(0, self._publish_pending_since + max_delay - now))
+        self._publish_unsub = async_call_later(self.hass, delay, self._async_publish_timer)
+
+    @callback
+    def _async_publish_timer(self, _now: datetime) -> None:
+        """Publish the changes of a burst when the coalescing timer fires."""
+        self._publish_unsub = None
+        self._async_publish_now()
+
+    @callback
+    def _async_cancel_publish(self) -> None:
+        """Drop a pending coalesced publication (superseded by a full refresh)."""
+        if self._publish_unsub is not None:
+            self._publish_unsub()
+            self._publish_unsub = None
+        self._publish_pending_since = None
+
+    @callback
+    def _async_publish_now(self) -> None:
+        """Publish the snapshot after one or more mutations.
+
+        Derived from the previous one by the mutation's deltas (bisect lookups,
+        then a copy of each touched slice: linear with a small constant), or
+        rebuilt in one pass when stale. Sensors whose slices were not touched
+        by the mutation skip their state write.
+        """
+        if self._snapshot_stale or self.data is None:
+            snapshot = self._build_snapshot()
+        else:
+            # Nothing marked as changed: assume every slice did
+            snapshot = self._next_snapshot or self.data.touch(self.data.versions)
+        self._snapshot_stale = False
+        self._next_snapshot = None
+        self._async_cancel_publish()
+        self._last_publish = time.monotonic()
+        self._publish_stats["published"] += 1
+        self.async_set_updated_data(snapshot)
+        self._async_fire_expiry_events()
+
+    def _rebuild_indexes(self) -> None:
+        """Rebuild the secondary indexes from scratch (load, import, reset)."""
+        self._snapshot_stale = True
+        self._index_location = {}
+        self._index_category = {}
+        self._index_zone = {}
+        self._index_barcode = {}
+        self._index_expiry = []
+        self._index_expiry_location = {}
+        self._index_undated = {}
         for product_id, product in self._products.items():
-            expiry_str = product.get("expiry_date")
-            if not expiry_str:
-                continue
+            self._check_expiry(product_id, product)
+            self._index_add(product_id, self._index_keys(product), sort=False)
+        self._index_expiry.sort()
+        for entries in self._index_expiry_location.values():
+            entries.sort()
+        self._expiry_scheduler.rebuild(
+            {product_id: product.expiry_ordinal for product_id, product in self._products.items()}
+        )
+
+    def _ids_by_category(self, location: str, category: str) -> list[str]:
+        """Return the IDs of the products of a category in a location."""
+        return list(self._index_category.get((location, category), ()))
+
+    def _ids_by_zone(self, location: str, zone: str) -> list[str]:
+        """Return the IDs of the products of a zone in a location."""
+        return list(self._index_zone.get((location, zone), ()))
+
+    def _expiry_slice(
+        self,
+        first_day: int | None,
+        last_day: int | None,
+        location: str | None,
+    ) -> tuple[list[tuple[int, str]], int, int]:
+        """Return the expiry index of a location (all if None) and the [start, end) slice of a day range."""
+        if location is None:
+            entries = self._index_expiry
+        else:
+            entries = self._index_expiry_location.get(location, [])
+        today = dt_util.now().date().toordinal()
+        start = 0 if first_day is None else bisect.bisect_left(entries, (today + first_day,))
+        end = len(entries) if last_day is None else bisect.bisect_left(entries, (today + last_day + 1,))
+        return entries, start, end
+
+    def _expiry_range(
+        self,
+        first_day: int | None = None,
+        last_day: int | None = None,
+        location: str | None = None,
+    ) -> list[tuple[int, str]]:
+        """Return (days until expiry, product ID) pairs, soonest first.
+
+        `first_day` and `last_day` are inclusive bounds in days from today
+        (None = unbounded); undated products are never returned.
+        """
+        entries, start, end = self._expiry_slice(first_day, last_day, location)
+        today = dt_util.now().date().toordinal()
+        return [(expiry - today, pid) for expiry, pid in entries[start:end]]
+
+    def _next_to_expire(
+        self,
+        location: str | None,
+        expiry_from: str | None,
+        expiry_to: str | None,
+        count: int,
+        after: tuple[Any, str] | None,
+    ) -> tuple[int, list[str]] | None:
+        """Return (total, IDs) of the first `count` products to expire, read from the expiry index.
+
+        The "next K to expire" query costs O(log n + K). Returns None when
+        the page reaches the undated products, which sort last and are not
+        in the index.
+        """
+        first_day, last_day = self._expiry_bounds(expiry_from, expiry_to)
+        entries, start, end = self._expiry_slice(first_day, last_day, location)
+        dated = end - start
+        if expiry_from is not None or expiry_to is not None:
+            total = dated
+        elif location is not None:
+            total = len(self._index_location.get(location, ()))
+        else:
+            total = len(self._products)
+        if after is not None:
+            start = max(start, bisect.bisect_right(entries, (parse_expiry(after[0]), after[1])))
+        stop = min(end, start + count)
+        if stop - start < count and total > dated:
+            return None
+        return total, [pid for _, pid in entries[start:stop]]
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Mark data as dirty and schedule a coalesced write.
+
+        The write happens once the inventory has been idle for `save_delay`
+        seconds, but never later than `save_max_delay` seconds after the first
+        unsaved change, so a long scanning session still reaches the disk.
+        """
+        now = time.monotonic()
+        self._save_stats["requested"] += 1
+        if self._dirty_since is None:
+            self._dirty_since = now
+        else:
+            self._save_stats["coalesced"] += 1
+
+        if self._save_unsub is not None:
+            self._save_unsub()
+
+        save_delay = self.entry.options.get(CONF_SAVE_DELAY, DEFAULT_SAVE_DELAY)
+        max_delay = self.entry.options.get(CONF_SAVE_MAX_DELAY, DEFAULT_SAVE_MAX_DELAY)
+        delay = min(save_delay, max(0, self._dirty_since + max_delay - now))
+        self._save_unsub = async_call_later(self.hass, delay, self._async_save_timer)
+
+    async def _async_save_timer(self, _now: datetime) -> None:
+        """Write pending changes when the write-behind timer fires."""
+        self._save_unsub = None
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Write pending changes immediately (unload, Home Assistant stop)."""
+        if self._save_unsub is not None:
+            self._save_unsub()
+            self._save_unsub = None
+        if self._dirty_since is None:
+            return
+        await self.async_save_data()
 
+    async def async_save_data(self) -> None:
+        """Save inventory data to storage.
+
+        Pending journal records are appended to the journal; the full snapshot
+        is only rewritten (compaction) when the journal grows past its
+        thresholds or after a bulk change.
+        """
+        async with self._save_lock:
+            # Changes made while waiting for the lock are part of this write
+            self._dirty_since = None
+            records, self._pending_records = self._pending_records, []
+            compact = self._snapshot_required or self._store.needs_compaction(records)
+            shards = None if self._snapshot_required else self._dirty_shards
+            if compact:
+                self._snapshot_required = False
+                self._dirty_shards = set()
             try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                days_until_expiry = (expiry_date - today).days
-                
-                notification_type = None
-
-                # Logique simplifiée
-                if days_until_expiry < 0:
-                    notification_type = "expired"
-                elif days_until_expiry == 0:
-                    notification_type = "expires_today"
-                elif days_until_expiry <= 3:
-                    notification_type = "expires_soon"
-
-                if notification_type:
-                    _LOGGER.info(
-                        "Sending expiry event for %s (%s, %d days)",
-                        product.get("name"),
-                        notification_type,
-                        days_until_expiry
+                if compact:
+                    await self.hass.async_add_executor_job(
+                        self._store.write_snapshot, self._snapshot_data(shards), records, shards
                     )
-                    self.hass.bus.async_fire(
-                        EVENT_PRODUCT_EXPIRING,
-                        {
-                            "product_id": product_id,
-                            "name": product.get("name", "Inconnu"),
-                            "expiry_date": expiry_str,
-                            "days_until_expiry": days_until_expiry,
-                            "location": product.get("location"),
-                            "notification_type": notification_type,
-                        },
+                elif records:
+                    await self.hass.async_add_executor_job(self._store.append, records)
+                if compact or records:
+                    self._save_stats["written"] += 1
+                    _LOGGER.debug(
+                        "Saved %d products to storage (%s, %d save requests coalesced so far)",
+                        len(self._products),
+                        f"rewrote {sorted(shards) if shards is not None else 'all'} files"
+                        if compact
+                        else f"{len(records)} journal records",
+                        self._save_stats["coalesced"],
+                    )
+            except Exception as err:
+                _LOGGER.error("Error saving inventory data: %s", err)
+                # The journal may now be incomplete: retry with a full snapshot
+                self._snapshot_required = True
+                if self._dirty_since is None:
+                    self._dirty_since = time.monotonic()
+            if self._expiry_scheduler.dirty:
+                try:
+                    await self.hass.async_add_executor_job(
+                        write_state_file,
+                        self._notifications_path,
+                        self._expiry_scheduler.as_dict(),
                     )
+                except Exception as err:
+                    _LOGGER.error("Error saving expiry notification state: %s", err)
+                    self._expiry_scheduler.dirty = True
 
-            except ValueError:
-                continue
+    def _snapshot_data(self, shards: set[str] | None = None) -> dict[str, Any]:
+        """Return a copy of the data of the given shards (all if None) for a snapshot write.
+
+        Copied on the event loop: mutations may run while the executor
+        serialises the data.
+        """
+        if shards is None:
+            products = {pid: p.to_dict() for pid, p in self._products.items()}
+        else:
+            products = {
+                pid: self._products[pid].to_dict()
+                for location, ids in self._index_location.items()
+                if shard_for_location(location) in shards
+                for pid in ids
+            }
+        data = {
+            "products": products,
+            "last_updated": datetime.now().isoformat(),
+        }
+        if shards is None or SHARD_HISTORY in shards:
+            data["product_history"] = self.product_history
+        return data
+
+    async def _async_update_data(self) -> InventorySnapshot:
+        """Update data and send the expiry notifications of the new day."""
+        self._async_cancel_publish()
+        self._async_fire_expiry_events()
+        # Full rebuild at day rollover (also a consistency check of the deltas)
+        self._snapshot_stale = False
+        self._next_snapshot = None
+        return self._build_snapshot()
+
+    def _build_snapshot(self) -> InventorySnapshot:
+        """Build the data shared by all sensors in one pass over the expiry index."""
+        today = dt_util.now().date().toordinal()
+        locations: dict[str, list[ProductEntry]] = {location: [] for location in STORAGE_LOCATIONS}
+        expired_by_location: dict[str, list[ProductEntry]] = {
+            location: [] for location in STORAGE_LOCATIONS
+        }
+        expired: list[ProductEntry] = []
+        expiring: list[ProductEntry] = []
+
+        for expiry, product_id in self._index_expiry:
+            product = self._products[product_id]
+            location = product.get("location")
+            entry = (expiry - today, product_id, product)
+            locations.setdefault(location, []).append(entry)
+            if entry[0] < 0:
+                expired.append(entry)
+                expired_by_location.setdefault(location, []).append(entry)
+            elif entry[0] <= EXPIRING_SOON_DAYS:
+                expiring.append(entry)
+
+        # Undated products come last in their location
+        for location, ids in self._index_undated.items():
+            locations.setdefault(location, []).extend(
+                (None, product_id, self._products[product_id]) for product_id in ids
+            )
+
+        # A rebuild changes every slice (new day, bulk change)
+        keys = {SLICE_TOTAL, SLICE_EXPIRED, SLICE_EXPIRING}
+        keys.update(location_slice(location) for location in locations)
+        keys.update(expired_slice(location) for location in expired_by_location)
+        previous = self.data.versions if self.data is not None else {}
+        keys.update(previous)
+
+        return InventorySnapshot(
+            today=today,
+            total=len(self._products),
+            locations=MappingProxyType(
+                {location: tuple(entries) for location, entries in locations.items()}
+            ),
+            expired=tuple(expired),
+            expired_by_location=MappingProxyType(
+                {location: tuple(entries) for location, entries in expired_by_location.items()}
+            ),
+            expiring=tuple(expiring),
+            versions=MappingProxyType({key: previous.get(key, 0) + 1 for key in keys}),
+        )
+
+    @callback
+    def async_track_day_rollover(self) -> CALLBACK_TYPE:
+        """Rebuild the snapshot at every local midnight (DST and time zone aware)."""
+        return async_track_time_change(
+            self.hass, self._async_day_rollover, hour=0, minute=0, second=0
+        )
+
+    async def _async_day_rollover(self, _now: datetime) -> None:
+        """Recompute days until expiry for the new day."""
+        _LOGGER.debug("Day rollover, rebuilding expiry buckets")
+        await self.async_refresh()
+
+    @callback
+    def _async_fire_expiry_events(self) -> None:
+        """Send the expiry notifications that became due (each one only once)."""
+        due = self._expiry_scheduler.pop_due(dt_util.now().date().toordinal())
+        if not due:
+            return
+        mode = self.entry.options.get(CONF_EXPIRY_EVENT_MODE, DEFAULT_EXPIRY_EVENT_MODE)
+        notifications: dict[str, dict[str, list[dict[str, Any]]]] = {}
+        for product_id, days_until_expiry, notification_type in due:
+            product = self._products[product_id]
+            _LOGGER.debug(
+                "Expiry event for %s (%s, %d days)",
+                product.get("name"),
+                notification_type,
+                days_until_expiry
+            )
+            data = {
+                "product_id": product_id,
+                "name": product.get("name", "Inconnu"),
+                "expiry_date": product.get("expiry_date"),
+                "days_until_expiry": days_until_expiry,
+                "location": product.get("location"),
+                "notification_type": notification_type,
+            }
+            if mode != EXPIRY_EVENT_MODE_BATCHED:
+                self._expiry_event_queue.append(data)
+            if mode != EXPIRY_EVENT_MODE_PER_PRODUCT:
+                notifications.setdefault(notification_type, {}).setdefault(
+                    data["location"], []
+                ).append(data)
+
+        _LOGGER.info("Sending expiry events for %d products (%s)", len(due), mode)
+        if notifications:
+            self.hass.bus.async_fire(
+                EVENT_PRODUCTS_EXPIRING,
+                {"count": len(due), "notifications": notifications},
+            )
+        if self._expiry_event_unsub is None:
+            self._async_send_expiry_events()
+        # Persist the sent state with the next write
+        self.async_schedule_save()
+
+    @callback
+    def _async_send_expiry_events(self, _now: datetime | None = None) -> None:
+        """Fire queued per-product expiry events within the per-minute rate limit."""
+        self._expiry_event_unsub = None
+        rate = self.entry.options.get(CONF_EXPIRY_EVENT_RATE, DEFAULT_EXPIRY_EVENT_RATE)
+        now = time.monotonic()
+        while self._expiry_event_times and now - self._expiry_event_times[0] >= 60:
+            self._expiry_event_times.popleft()
+        while self._expiry_event_queue:
+            if rate and len(self._expiry_event_times) >= rate:
+                # Resume when the oldest event of the window is a minute old
+                self._expiry_event_unsub = async_call_later(
+                    self.hass,
+                    60 - (now - self._expiry_event_times[0]),
+                    self._async_send_expiry_events,
+                )
+                _LOGGER.debug(
+                    "Expiry event rate limit reached, %d events delayed",
+                    len(self._expiry_event_queue),
+                )
+                return
+            self._expiry_event_times.append(now)
+            self.hass.bus.async_fire(EVENT_PRODUCT_EXPIRING, self._expiry_event_queue.popleft())
 
     async def async_fetch_product_info(self, barcode: str) -> dict[str, Any] | None:
         """Fetch product information from Open Food Facts.
@@ -286,62 +1059,39 @@ class InventoryCoordinator(DataUpdateCoordinator):
 
     def _map_category(self, categories_tags: list[str], location: str = STORAGE_FREEZER, product_name: str = "") -> str:
         """Map categories tags or product name to our simplified categories for a specific location."""
-        # Get custom categories from config for the specific location
-        all_categories = self.entry.options.get("categories", DEFAULT_CATEGORIES)
-        if isinstance(all_categories, dict):
-            location_categories = all_categories.get(location, DEFAULT_CATEGORIES.get(location, []))
-        else:
-            # Backward compatibility
-            location_categories = all_categories if isinstance(all_categories, list) else []
-        
-        # Try to match from categories_tags first (for Open Food Facts)
-        if categories_tags:
-            # Convert tags to lowercase for matching
-            tags_lower = [tag.lower() for tag in categories_tags]
-            tags_str = " ".join(tags_lower)
-            
-            # First pass: exact word matching for better precision
-            for category in location_categories:
-                keywords = CATEGORY_MAPPING.get(category, [])
-                for keyword in keywords:
-                    # Match whole words or within tag structure (en:keyword)
-                    if f":{keyword}" in tags_str or f" {keyword} " in f" {tags_str} " or f"-{keyword}" in tags_str:
-                        return category
-            
-            # Second pass: substring matching (original behavior)
-            for category in location_categories:
-                keywords = CATEGORY_MAPPING.get(category, [])
-                for keyword in keywords:
-                    if keyword in tags_str:
-                        return category
-        
-        # If no match from tags, try to detect from product name
-        if product_name:
-            product_name_lower = product_name.lower()
-            
-            # Check each category against product name
-            for category in location_categories:
-                keywords = CATEGORY_MAPPING.get(category, [])
-                for keyword in keywords:
-                    if keyword in product_name_lower:
-                        return category
-        
-        return "Autre"
-
-    def _add_to_history(self, name: str, category: str, zone: str, location: str) -> None:
-        """Add a product to history for autocomplete (keep last 100, avoid duplicates)."""
-        # Check if product with same name already exists in history
-        existing_idx = None
-        for i, item in enumerate(self._product_history):
-            if item.get("name", "").lower() == name.lower():
-                existing_idx = i
-                break
-        
-        # Remove existing entry to add fresh one at the beginning
-        if existing_idx is not None:
-            self._product_history.pop(existing_idx)
-        
-        # Add to beginning of history
+        key = (tuple(categories_tags or ()), product_name, location)
+        category = self._category_cache.get(key)
+        if category is not None:
+            self._category_cache.move_to_end(key)
+            self._category_cache_stats["hits"] += 1
+            return category
+
+        self._category_cache_stats["misses"] += 1
+        category = self._category_matcher(location).match(categories_tags, product_name)
+        self._category_cache[key] = category
+        if len(self._category_cache) > CATEGORY_CACHE_SIZE:
+            self._category_cache.popitem(last=False)
+        return category
+
+    def _invalidate_category_mapping(self) -> None:
+        """Forget mapped categories after the categories changed."""
+        self._category_cache.clear()
+        self._category_matchers.clear()
+
+    def _category_matcher(self, location: str) -> CategoryMatcher:
+        """Return the compiled keyword matcher of a location.
+
+        Rebuilt only when the location's categories (from the options) change.
+        """
+        location_categories = tuple(self.get_categories(location))
+        cached = self._category_matchers.get(location)
+        if cached is None or cached[0] != location_categories:
+            cached = (location_categories, CategoryMatcher(list(location_categories)))
+            self._category_matchers[location] = cached
+        return cached[1]
+
+    def _add_to_history(self, name: str, category: str, zone: str, location: str) -> dict[str, Any]:
+        """Add a product to history for autocomplete and return the history item."""
         history_item = {
             "name": name,
             "category": category,
@@ -349,20 +1099,62 @@ class InventoryCoordinator(DataUpdateCoordinator):
             "location": location,
             "added_date": datetime.now().isoformat(),
         }
-        self._product_history.insert(0, history_item)
-        
-        # Keep only last 100
-        if len(self._product_history) > 100:
-            self._product_history = self._product_history[:100]
+        self._push_history(history_item)
+        return history_item
+
+    def _push_history(self, history_item: dict[str, Any]) -> None:
+        """Put a history item first (one entry per name, capped to `history_size`)."""
+        key = history_item.get("name", "").lower()
+        # Replace the existing entry for this name and move it to the front
+        self._product_history.pop(key, None)
+        self._product_history[key] = history_item
+        self._history_version += 1
+
+        max_items = self.history_size
+        while len(self._product_history) > max_items:
+            self._product_history.popitem(last=False)
+
+    @property
+    def history_size(self) -> int:
+        """Return the maximum number of autocomplete history items."""
+        return self.entry.options.get(CONF_HISTORY_SIZE, DEFAULT_HISTORY_SIZE)
+
+    @callback
+    def async_update_history_size(self) -> None:
+        """Apply a changed `history_size` option to the history and the store."""
+        if isinstance(self._store, SqliteInventoryStore):
+            self._store.history_size = self.history_size
+        if len(self._product_history) <= self.history_size:
+            return
+        while len(self._product_history) > self.history_size:
+            self._product_history.popitem(last=False)
+        self._history_version += 1
+        self._dirty_shards.add(SHARD_HISTORY)
+        self.async_schedule_save()
+        # The history is an attribute of the total sensor
+        snapshot = self._editable_snapshot()
+        if snapshot is not None:
+            self._next_snapshot = snapshot.touch([SLICE_TOTAL])
+        self._async_publish()
+
+    def _set_history(self, items: list[dict[str, Any]]) -> None:
+        """Replace the history with a stored list (most recent first)."""
+        self._product_history = OrderedDict()
+        self._history_version += 1
+        for history_item in reversed(items):
+            self._push_history(history_item)
 
     async def async_clear_location(self, location: str) -> int:
         """Clear all products from a specific location. Returns count of deleted products."""
-        to_delete = [pid for pid, p in self._products.items() if p.get("location") == location]
+        to_delete = list(self._index_location.get(location, ()))
+        # Bulk change: rebuild the snapshot once instead of one delta per product
+        self._snapshot_stale = True
         for pid in to_delete:
-            del self._products[pid]
+            self._index_remove(pid, self._index_keys(self._products.pop(pid)))
+            self._expiry_scheduler.discard(pid)
         
-        await self.async_save_data()
-        await self.async_request_refresh()
+        self._journal({"op": "clear", "location": location}, location)
+        self._async_publish()
         
         _LOGGER.info("Cleared %d products from %s", len(to_delete), location)
         return len(to_delete)
@@ -373,10 +1165,11 @@ class InventoryCoordinator(DataUpdateCoordinator):
         history_count = len(self._product_history)
         
         self._products = {}
-        self._product_history = []
+        self._set_history([])
+        self._rebuild_indexes()
         
-        await self.async_save_data()
-        await self.async_request_refresh()
+        self._require_snapshot()
+        self._async_publish()
         
         _LOGGER.info("Reset all: cleared %d products and %d history items", product_count, history_count)
         return {"products": product_count, "history": history_count}
@@ -386,8 +1179,8 @@ class InventoryCoordinator(DataUpdateCoordinator):
         return {
             "version": "1.15.0",
             "export_date": datetime.now().isoformat(),
-            "products": self._products,
-            "product_history": self._product_history,
+            "products": {pid: p.to_dict() for pid, p in self._products.items()},
+            "product_history": self.product_history,
             "categories": self.entry.options.get("categories", DEFAULT_CATEGORIES),
             "zones": self.entry.options.get("zones", DEFAULT_ZONES),
         }
@@ -416,17 +1209,19 @@ class InventoryCoordinator(DataUpdateCoordinator):
                                 product["location"] = location
                                 # Remove days_until_expiry as it's computed
                                 product.pop("days_until_expiry", None)
-                                new_products[product_id] = product
+                                new_products[product_id] = Product.from_dict(product)
                 self._products = new_products
                 imported["products"] = len(new_products)
             else:
                 # Already in internal format
-                self._products = products_data
+                self._products = {
+                    pid: Product.from_dict(product) for pid, product in products_data.items()
+                }
                 imported["products"] = len(self._products)
         
         # Import history
         if "product_history" in data and isinstance(data["product_history"], list):
-            self._product_history = data["product_history"]
+            self._set_history(data["product_history"])
             imported["history"] = len(self._product_history)
         
         # Import categories
@@ -434,6 +1229,7 @@ class InventoryCoordinator(DataUpdateCoordinator):
             new_options = dict(self.entry.options)
             new_options["categories"] = data["categories"]
             self.hass.config_entries.async_update_entry(self.entry, options=new_options)
+            self._invalidate_category_mapping()
             imported["categories"] = sum(len(cats) for cats in data["categories"].values()) if isinstance(data["categories"], dict) else 0
         
         # Import zones
@@ -443,8 +1239,9 @@ class InventoryCoordinator(DataUpdateCoordinator):
             self.hass.config_entries.async_update_entry(self.entry, options=new_options)
             imported["zones"] = sum(len(zones) for zones in data["zones"].values()) if isinstance(data["zones"], dict) else 0
         
-        await self.async_save_data()
-        await self.async_request_refresh()
+        self._rebuild_indexes()
+        self._require_snapshot()
+        self._async_publish()
         
         _LOGGER.info("Imported data: %s", imported)
         return imported
@@ -478,6 +1275,91 @@ class InventoryCoordinator(DataUpdateCoordinator):
         zone: str | None = None,
     ) -> str:
         """Add a product to the inventory."""
+        product_id, data = self._insert_product(
+            name, expiry_date, location, quantity, barcode, brand, image_url, category, zone
+        )
+        
+        # Fire event
+        self.hass.bus.async_fire(
+            EVENT_PRODUCT_ADDED,
+            {
+                "product_id": product_id,
+                **data,
+            },
+        )
+        
+        # Trigger update
+        self._async_publish()
+        
+        _LOGGER.info("Added product: %s (ID: %s)", name, product_id)
+        return product_id
+
+    async def async_add_products(self, items: list[dict[str, Any]]) -> list[str]:
+        """Add several products at once. Returns their IDs, in order.
+
+        Each item holds the arguments of async_add_product; an item with a
+        barcode but no name is looked up like scan_product (lookups run
+        concurrently, before anything is inserted). The whole list costs one
+        write and one sensor update.
+        """
+        added = [self._insert_item(item) for item in await self._async_resolve_items(items)]
+
+        for product_id, data in added:
+            self.hass.bus.async_fire(EVENT_PRODUCT_ADDED, {"product_id": product_id, **data})
+        self._async_publish()
+
+        _LOGGER.info("Added %d products", len(added))
+        return [product_id for product_id, _ in added]
+
+    async def _async_resolve_items(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Return the items to add, with the barcode-only ones described (lookups run concurrently)."""
+        lookups = await asyncio.gather(
+            *(
+                self._async_describe_barcode(item[ATTR_BARCODE], item.get(ATTR_LOCATION, STORAGE_FREEZER))
+                for item in items
+                if not item.get(ATTR_NAME)
+            )
+        )
+        described = iter(lookups)
+        resolved = []
+        for item in items:
+            item = dict(item)
+            if not item.get(ATTR_NAME):
+                described_item = next(described)
+                item[ATTR_NAME] = described_item["name"]
+                item[ATTR_BRAND] = described_item["brand"]
+                item[ATTR_IMAGE_URL] = described_item["image_url"]
+                item[ATTR_CATEGORY] = item.get(ATTR_CATEGORY) or described_item["category"]
+            resolved.append(item)
+        return resolved
+
+    def _insert_item(self, item: dict[str, Any]) -> tuple[str, dict[str, Any]]:
+        """Insert a resolved item (see _async_resolve_items) without publishing it."""
+        return self._insert_product(
+            item[ATTR_NAME],
+            item.get(ATTR_EXPIRY_DATE),
+            item.get(ATTR_LOCATION, STORAGE_FREEZER),
+            item.get(ATTR_QUANTITY, 1),
+            item.get(ATTR_BARCODE),
+            item.get(ATTR_BRAND),
+            item.get(ATTR_IMAGE_URL),
+            item.get(ATTR_CATEGORY),
+            item.get(ATTR_ZONE),
+        )
+
+    def _insert_product(
+        self,
+        name: str,
+        expiry_date: str | None,
+        location: str,
+        quantity: int,
+        barcode: str | None,
+        brand: str | None,
+        image_url: str | None,
+        category: str | None,
+        zone: str | None,
+    ) -> tuple[str, dict[str, Any]]:
+        """Insert a product (indexes, snapshot, history, journal) without publishing it."""
         product_id = str(uuid.uuid4())[:8]
         
         # Default zone is the first one for the specified location
@@ -489,7 +1371,7 @@ class InventoryCoordinator(DataUpdateCoordinator):
         if category is None:
             category = "Autre"
         
-        product = {
+        data = {
             "name": name,
             "expiry_date": expiry_date,
             "location": location,
@@ -500,33 +1382,27 @@ class InventoryCoordinator(DataUpdateCoordinator):
         }
         
         if barcode:
-            product["barcode"] = barcode
+            data["barcode"] = barcode
         if brand:
-            product["brand"] = brand
+            data["brand"] = brand
         if image_url:
-            product["image_url"] = image_url
+            data["image_url"] = image_url
 
+        product = Product.from_dict(data)
+        self._check_expiry(product_id, product)
         self._products[product_id] = product
+        self._index_add(product_id, self._index_keys(product))
+        self._snapshot_add(product_id)
+        self._expiry_scheduler.schedule(product_id, product.expiry_ordinal)
         
         # Add to product history for autocomplete (keep last 100)
-        self._add_to_history(name, category, zone, location)
+        history_item = self._add_to_history(name, category, zone, location)
         
-        await self.async_save_data()
-        
-        # Fire event
-        self.hass.bus.async_fire(
-            EVENT_PRODUCT_ADDED,
-            {
-                "product_id": product_id,
-                **product,
-            },
+        self._journal(
+            {"op": "add", "id": product_id, "product": data, "history": history_item},
+            location,
         )
-        
-        # Trigger update
-        await self.async_request_refresh()
-        
-        _LOGGER.info("Added product: %s (ID: %s)", name, product_id)
-        return product_id
+        return product_id, data
 
     async def async_scan_and_add_product(
         self,
@@ -536,58 +1412,68 @@ class InventoryCoordinator(DataUpdateCoordinator):
         quantity: int = 1,
     ) -> dict[str, Any]:
         """Scan a barcode and add the product to inventory."""
-        # Fetch product info from Open Food Facts
-        product_info = await self.async_fetch_product_info(barcode)
+        described = await self._async_describe_barcode(barcode, location)
+        product_id = await self.async_add_product(
+            name=described["name"],
+            expiry_date=expiry_date,
+            location=location,
+            quantity=quantity,
+            barcode=barcode,
+            brand=described["brand"],
+            image_url=described["image_url"],
+            category=described["category"],
+        )
         
+        product_info = described["info"]
         if product_info:
-            name = product_info["name"]
-            if product_info.get("brand"):
-                name = f"{product_info['brand']} - {name}"
-            
-            # Déterminer la catégorie depuis les tags ou le nom du produit
-            categories_tags = product_info.get("categories_tags", [])
-            category = self._map_category(categories_tags, location, product_name=product_info["name"])
-            
-            product_id = await self.async_add_product(
-                name=name,
-                expiry_date=expiry_date,
-                location=location,
-                quantity=quantity,
-                barcode=barcode,
-                brand=product_info.get("brand"),
-                image_url=product_info.get("image_url"),
-                category=category,
-            )
-            
             return {
                 "success": True,
                 "product_id": product_id,
-                "name": name,
-                "category": category,
+                "name": described["name"],
+                "category": described["category"],
                 "source": product_info.get("source", "Unknown"),
                 "info": product_info,
             }
         else:
-            # Product not found in any database, create with barcode as name
-            product_id = await self.async_add_product(
-                name=f"Produit {barcode}",
-                expiry_date=expiry_date,
-                location=location,
-                quantity=quantity,
-                barcode=barcode,
-                category="Autre",
-            )
-            
             return {
                 "success": True,
                 "product_id": product_id,
-                "name": f"Produit {barcode}",
-                "category": "Autre",
+                "name": described["name"],
+                "category": described["category"],
                 "source": "Manual",
                 "info": None,
                 "warning": "Produit non trouvé dans les bases de données",
             }
 
+    async def _async_describe_barcode(self, barcode: str, location: str) -> dict[str, Any]:
+        """Return the name, category, brand and image of a barcode (and the raw product info)."""
+        # Fetch product info from Open Food Facts
+        product_info = await self.async_fetch_product_info(barcode)
+        
+        if not product_info:
+            # Product not found in any database, named after its barcode
+            return {
+                "name": f"Produit {barcode}",
+                "category": "Autre",
+                "brand": None,
+                "image_url": None,
+                "info": None,
+            }
+
+        name = product_info["name"]
+        if product_info.get("brand"):
+            name = f"{product_info['brand']} - {name}"
+        
+        # Déterminer la catégorie depuis les tags ou le nom du produit
+        categories_tags = product_info.get("categories_tags", [])
+        return {
+            "name": name,
+            "category": self._map_category(categories_tags, location, product_name=product_info["name"]),
+            "brand": product_info.get("brand"),
+            "image_url": product_info.get("image_url"),
+            "info": product_info,
+        }
+
     async def async_remove_product(self, product_id: str) -> bool:
         """Remove a product from the inventory."""
         # Normaliser l'ID en string
@@ -600,8 +1486,7 @@ class InventoryCoordinator(DataUpdateCoordinator):
             _LOGGER.warning("Product not found: %s. Available IDs: %s", product_id, list(self._products.keys()))
             return False
 
-        product = self._products.pop(product_id)
-        await self.async_save_data()
+        product = self._delete_product(product_id)
         
         # Fire event
         self.hass.bus.async_fire(
@@ -613,11 +1498,56 @@ class InventoryCoordinator(DataUpdateCoordinator):
         )
         
         # Trigger update
-        await self.async_request_refresh()
+        self._async_publish()
         
         _LOGGER.info("Removed product: %s", product_id)
         return True
 
+    def _delete_product(self, product_id: str) -> Product:
+        """Remove a product (indexes, snapshot, expiry schedule, journal) without publishing it."""
+        product = self._products.pop(product_id)
+        keys = self._index_keys(product)
+        self._index_remove(product_id, keys)
+        self._snapshot_remove(product_id, keys)
+        self._expiry_scheduler.discard(product_id)
+        self._journal({"op": "remove", "id": product_id}, product.get("location"))
+        return product
+
+    def _prepare_bulk(self, count: int) -> None:
+        """Rebuild the snapshot once if a bulk operation changes many products."""
+        if count > BULK_SNAPSHOT_REBUILD:
+            self._snapshot_stale = True
+
+    async def async_remove_products(self, product_ids: list[str]) -> list[dict[str, Any]]:
+        """Remove several products at once (one write, one sensor update).
+
+        Returns one result per requested ID, in order.
+        """
+        product_ids = [str(product_id) for product_id in product_ids]
+        self._prepare_bulk(len(product_ids))
+        results: list[dict[str, Any]] = []
+        removed: list[tuple[str, Product]] = []
+        for product_id in product_ids:
+            if product_id not in self._products:
+                results.append({"product_id": product_id, "success": False, "error": "not_found"})
+                continue
+            removed.append((product_id, self._delete_product(product_id)))
+            results.append({"product_id": product_id, "success": True})
+
+        for product_id, product in removed:
+            self.hass.bus.async_fire(
+                EVENT_PRODUCT_REMOVED,
+                {
+                    "product_id": product_id,
+                    "name": product.get("name", "Inconnu"),
+                },
+            )
+        if removed:
+            self._async_publish()
+
+        _LOGGER.info("Removed %d products", len(removed))
+        return results
+
     async def async_update_quantity(
         self, product_id: str, quantity: int
     ) -> bool:
@@ -630,13 +1560,22 @@ class InventoryCoordinator(DataUpdateCoordinator):
             # Remove product if quantity is 0 or less
             return await self.async_remove_product(product_id)
 
-        self._products[product_id]["quantity"] = quantity
-        await self.async_save_data()
-        await self.async_request_refresh()
+        self._set_quantity(product_id, quantity)
+        self._async_publish()
         
         _LOGGER.info("Updated quantity for %s: %d", product_id, quantity)
         return True
 
+    def _set_quantity(self, product_id: str, quantity: int) -> None:
+        """Set the quantity of a product (snapshot, journal) without publishing it."""
+        product = self._products[product_id]
+        product.quantity = quantity
+        self._snapshot_touch(product_id)
+        self._journal(
+            {"op": "quantity", "id": product_id, "quantity": quantity},
+            product.get("location"),
+        )
+
     async def async_update_product(
         self,
         product_id: str,
@@ -651,73 +1590,368 @@ class InventoryCoordinator(DataUpdateCoordinator):
             _LOGGER.warning("Product not found: %s", product_id)
             return False
 
-        product = self._products[product_id]
+        if quantity is not None and quantity <= 0:
+            return await self.async_remove_product(product_id)
+
+        changes: dict[str, Any] = {}
         
         if name is not None:
-            product["name"] = name
+            changes["name"] = name
         
         if expiry_date is not None:
-            product["expiry_date"] = expiry_date if expiry_date else None
-            # Recalculate days until expiry
-            if expiry_date:
-                now = dt_util.now().date()
-                try:
-                    expiry = datetime.fromisoformat(expiry_date).date()
-                    product["days_until_expiry"] = (expiry - now).days
-                except ValueError:
-                    product.pop("days_until_expiry", None)
-            else:
-                product.pop("days_until_expiry", None)
+            changes["expiry_date"] = expiry_date if expiry_date else None
         
         if quantity is not None:
-            if quantity <= 0:
-                return await self.async_remove_product(product_id)
-            product["quantity"] = quantity
+            changes["quantity"] = quantity
         
         if category is not None:
-            product["category"] = category
+            changes["category"] = category
         
         if zone is not None:
-            product["zone"] = zone
+            changes["zone"] = zone
         
-        await self.async_save_data()
-        await self.async_request_refresh()
+        self._apply_product_changes(product_id, changes)
+        self._async_publish()
         
         _LOGGER.info("Updated product: %s", product_id)
         return True
 
+    def _apply_product_changes(self, product_id: str, changes: dict[str, Any]) -> None:
+        """Change fields of a product (indexes, snapshot, expiry schedule, journal) without publishing it."""
+        product = self._products[product_id]
+        old_keys = self._index_keys(product)
+        product.update(changes)
+        self._reindex(product_id, old_keys)
+        self._snapshot_touch(product_id)
+        if "expiry_date" in changes:
+            self._check_expiry(product_id, product)
+            # Recalculate days until expiry (from the freshly parsed ordinal)
+            days_until_expiry = self.days_until_expiry(product_id)
+            if days_until_expiry is None:
+                product.pop("days_until_expiry", None)
+            else:
+                product.update({"days_until_expiry": days_until_expiry})
+        if product.get("location") != old_keys[0]:
+            # Moved: the file of its previous location must drop it too
+            self._dirty_shards.add(shard_for_location(old_keys[0]))
+        self._journal_product("update", product_id)
+
+    async def async_update_products(
+        self, product_ids: list[str], changes: dict[str, Any]
+    ) -> list[dict[str, Any]]:
+        """Apply the same changes to several products (one write, one sensor update).
+
+        `changes` may set name, expiry_date (empty to remove it), quantity,
+        category, zone and location. Returns one result per requested ID, in order.
+        """
+        changes = dict(changes)
+        if "expiry_date" in changes:
+            changes["expiry_date"] = changes["expiry_date"] or None
+        product_ids = [str(product_id) for product_id in product_ids]
+        self._prepare_bulk(len(product_ids))
+        results: list[dict[str, Any]] = []
+        updated = 0
+        for product_id in product_ids:
+            if product_id not in self._products:
+                results.append({"product_id": product_id, "success": False, "error": "not_found"})
+                continue
+            self._apply_product_changes(product_id, changes)
+            results.append({"product_id": product_id, "success": True})
+            updated += 1
+        if updated:
+            self._async_publish()
+
+        _LOGGER.info("Updated %d products: %s", updated, list(changes))
+        return results
+
+    async def async_apply_batch(self, operations: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Apply an ordered list of operations all at once, or none of them.
+
+        Each operation has an `op` (add, update, remove, quantity) and the
+        fields of the matching service; a quantity of 0 removes the product.
+        The batch is first played against a staged copy of the products it
+        touches: if a step fails, BatchOperationError (carrying the step
+        index) is raised and the inventory is left untouched. Otherwise it is
+        committed without yielding to the event loop, so no other change can
+        interleave, for one write and one sensor update.
+
+        Returns one result per operation ({"op", "product_id"}), in order.
+        """
+        # Barcode lookups first: nothing may be awaited between staging and commit
+        adds = iter(
+            await self._async_resolve_items(
+                [operation for operation in operations if operation[ATTR_OP] == BATCH_OP_ADD]
+            )
+        )
+        operations = [
+            next(adds) if operation[ATTR_OP] == BATCH_OP_ADD else dict(operation)
+            for operation in operations
+        ]
+        self._stage_batch(operations)
+
+        self._prepare_bulk(len(operations))
+        results: list[dict[str, Any]] = []
+        added: list[tuple[str, dict[str, Any]]] = []
+        removed: list[tuple[str, Product]] = []
+        for operation in operations:
+            op = operation[ATTR_OP]
+            if op == BATCH_OP_ADD:
+                product_id, data = self._insert_item(operation)
+                added.append((product_id, data))
+            else:
+                product_id = str(operation[ATTR_PRODUCT_ID])
+                changes = _batch_changes(operation)
+                if op == BATCH_OP_REMOVE or changes.get(ATTR_QUANTITY, 1) <= 0:
+                    removed.append((product_id, self._delete_product(product_id)))
+                elif op == BATCH_OP_QUANTITY:
+                    self._set_quantity(product_id, changes[ATTR_QUANTITY])
+                else:
+                    self._apply_product_changes(product_id, changes)
+            results.append({"op": op, "product_id": product_id})
+
+        for product_id, data in added:
+            self.hass.bus.async_fire(EVENT_PRODUCT_ADDED, {"product_id": product_id, **data})
+        for product_id, product in removed:
+            self.hass.bus.async_fire(
+                EVENT_PRODUCT_REMOVED,
+                {
+                    "product_id": product_id,
+                    "name": product.get("name", "Inconnu"),
+                },
+            )
+        self._async_publish()
+
+        _LOGGER.info("Applied batch of %d operations", len(operations))
+        return results
+
+    def _stage_batch(self, operations: list[dict[str, Any]]) -> None:
+        """Play a batch against a staged copy of the products it touches.
+
+        Raises BatchOperationError at the first operation that cannot be applied.
+        """
+        # Product ID -> staged copy of the product (None once removed)
+        staged: dict[str, Product | None] = {}
+        for step, operation in enumerate(operations):
+            op = operation[ATTR_OP]
+            changes = operation if op == BATCH_OP_ADD else _batch_changes(operation)
+            expiry_date = changes.get(ATTR_EXPIRY_DATE)
+            if expiry_date and parse_expiry(expiry_date) is None:
+                raise BatchOperationError(step, f"Format de date invalide: {expiry_date}")
+            if op == BATCH_OP_ADD:
+                continue
+            product_id = str(operation[ATTR_PRODUCT_ID])
+            product = staged[product_id] if product_id in staged else self._products.get(product_id)
+            if product is None:
+                raise BatchOperationError(step, f"Produit introuvable: {product_id}")
+            if op == BATCH_OP_REMOVE or changes.get(ATTR_QUANTITY, 1) <= 0:
+                staged[product_id] = None
+            else:
+                product = Product(product.to_dict())
+                product.update(changes)
+                staged[product_id] = product
+
+    def select_products(
+        self,
+        location: str | None = None,
+        category: str | None = None,
+        zone: str | None = None,
+        expired: bool | None = None,
+        expiry_from: str | None = None,
+        expiry_to: str | None = None,
+    ) -> list[str]:
+        """Return the IDs of the products matching every given filter.
+
+        `expiry_from`/`expiry_to` are inclusive ISO dates; an expiry filter
+        never matches undated products. Candidates come from the most
+        selective index (expiry range, category, zone or location).
+        """
+        today = dt_util.now().date().toordinal()
+        if expired or expiry_from is not None or expiry_to is not None:
+            first_day, last_day = self._expiry_bounds(expiry_from, expiry_to)
+            if expired:
+                last_day = -1 if last_day is None else min(last_day, -1)
+            candidates = [pid for _, pid in self._expiry_range(first_day, last_day, location)]
+        else:
+            candidates = self._candidate_ids(location, category, zone, None)
+
+        filters = {"location": location, "category": category, "zone": zone}
+        selected = []
+        for pid in candidates:
+            product = self._products[pid]
+            if not all(value is None or product.get(key) == value for key, value in filters.items()):
+                continue
+            if expired is False and product.expiry_ordinal is not None and product.expiry_ordinal < today:
+                continue
+            selected.append(pid)
+        return selected
+
     def get_products_by_location(self, location: str) -> list[dict[str, Any]]:
         """Get all products in a specific location."""
         return [
-            {"id": pid, **product}
-            for pid, product in self._products.items()
-            if product.get("location") == location
+            {"id": pid, **self._products[pid].to_dict()}
+            for pid in self._index_location.get(location, ())
         ]
 
-    def get_expiring_products(self, days: int = 7) -> list[dict[str, Any]]:
-        """Get products expiring within the specified days."""
-        now = dt_util.now().date()
-        expiring = []
+    async def async_query_products(
+        self,
+        location: str | None = None,
+        category: str | None = None,
+        zone: str | None = None,
+        barcode: str | None = None,
+        expiry_from: str | None = None,
+        expiry_to: str | None = None,
+        name: str | None = None,
+        sort_by: str = "expiry_date",
+        descending: bool = False,
+        limit: int | None = None,
+        offset: int = 0,
+        cursor: str | None = None,
+        fields: list[str] | None = None,
+    ) -> dict[str, Any]:
+        """Return a page of matching products, sorted (by expiry date by default).
+
+        Filters are combined: `name` matches a substring (case-insensitive) and
+        `expiry_from`/`expiry_to` are inclusive ISO dates, never matched by
+        undated products. Products without a value for `sort_by` come last
+        (first when `descending`). A page is `limit` products from `offset`,
+        or after the `cursor` returned with the previous page; `fields` keeps
+        only some fields of each product (its ID is always included).
+
+        Returns {"products", "total" (all matching products), "next_cursor"
+        (None on the last page)}. Candidates come from the most selective
+        index and only the first offset + limit products are selected (heap)
+        and serialised, so the cost follows the page, not the inventory; the
+        next products to expire (expiry order, location and date filters
+        only) are a slice of the expiry index. With
+        the SQLite backend, filtering, sorting and paging run in SQL on the
+        executor once every change is saved; while changes wait for the
+        write-behind save the in-memory indexes answer instead, so polling
+        never forces a write. Raises ValueError for an invalid date or cursor.
+        """
+        after = None if cursor is None else _decode_cursor(cursor, sort_by, descending)
+        if after is not None:
+            offset = 0
+        # One more product than the page tells whether there is a next page
+        count = None if limit is None else limit + 1
+        filters = (location, category, zone, barcode, expiry_from, expiry_to, name)
+
+        saved = self._dirty_since is None and not self._save_lock.locked()
+        if self.storage_backend == STORAGE_BACKEND_SQLITE and saved:
+            # Raises ValueError for an invalid date, as the in-memory path does
+            self._expiry_bounds(expiry_from, expiry_to)
+            total = await self.hass.async_add_executor_job(self._store.count_products, *filters)
+            products = await self.hass.async_add_executor_job(
+                partial(
+                    self._store.query_products,
+                    *filters,
+                    sort_by=sort_by,
+                    descending=descending,
+                    limit=count,
+                    offset=offset,
+                    after=after,
+                )
+            )
+        else:
+            page = None
+            if (
+                sort_by == "expiry_date"
+                and not descending
+                and count is not None
+                and category is None
+                and zone is None
+                and barcode is None
+                and name is None
+                and (after is None or after[0] is not None)
+            ):
+                # Next products to expire: a slice of the expiry index
+                page = self._next_to_expire(location, expiry_from, expiry_to, offset + count, after)
+            if page is not None:
+                total, product_ids = page
+            else:
+                keys = [_sort_key(self._products[pid], pid, sort_by) for pid in self._match_products(*filters)]
+                total = len(keys)
+                if after is not None:
+                    after_key = _sort_key(Product({sort_by: after[0]}), after[1], sort_by)
+                    keys = [key for key in keys if (key < after_key if descending else key > after_key)]
+                if count is None:
+                    keys.sort(reverse=descending)
+                else:
+                    keys = (heapq.nlargest if descending else heapq.nsmallest)(offset + count, keys)
+                product_ids = [key[2] for key in keys]
+            products = [
+                {"id": pid, **self._products[pid].to_dict()} for pid in product_ids[offset:]
+            ]
+
+        next_cursor = None
+        if limit is not None and len(products) > limit:
+            products = products[:limit]
+            last = products[-1]
+            next_cursor = _encode_cursor(sort_by, descending, last.get(sort_by), last["id"])
+        if fields is not None:
+            products = [
+                {"id": product["id"], **{field: product[field] for field in fields if field in product}}
+                for product in products
+            ]
+        return {"products": products, "total": total, "next_cursor": next_cursor}
 
-        for product_id, product in self._products.items():
-            expiry_str = product.get("expiry_date")
-            if not expiry_str:
+    def _match_products(
+        self,
+        location: str | None,
+        category: str | None,
+        zone: str | None,
+        barcode: str | None,
+        expiry_from: str | None,
+        expiry_to: str | None,
+        name: str | None,
+    ) -> list[str]:
+        """Return the IDs of the products matching every given filter (unsorted)."""
+        if expiry_from is not None or expiry_to is not None:
+            first_day, last_day = self._expiry_bounds(expiry_from, expiry_to)
+            candidates = [pid for _, pid in self._expiry_range(first_day, last_day, location)]
+        else:
+            candidates = self._candidate_ids(location, category, zone, barcode)
+        filters = {"location": location, "category": category, "zone": zone, "barcode": barcode}
+        needle = None if name is None else name.casefold()
+        matches = []
+        for pid in candidates:
+            product = self._products[pid]
+            if not all(value is None or product.get(key) == value for key, value in filters.items()):
                 continue
-
-            try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                days_until_expiry = (expiry_date - now).days
-
-                if 0 <= days_until_expiry <= days:
-                    expiring.append({
-                        "id": product_id,
-                        "days_until_expiry": days_until_expiry,
-                        **product,
-                    })
-            except ValueError:
+            if needle is not None and needle not in str(product.get("name") or "").casefold():
                 continue
-
-        return sorted(expiring, key=lambda x: x["days_until_expiry"])
+            matches.append(pid)
+        return matches
+
+    def _expiry_bounds(
+        self, expiry_from: str | None, expiry_to: str | None
+    ) -> tuple[int | None, int | None]:
+        """Return inclusive ISO date bounds as days from today (None = unbounded)."""
+        today = dt_util.now().date().toordinal()
+        bounds = []
+        for value in (expiry_from, expiry_to):
+            ordinal = None if value is None else parse_expiry(value)
+            if value is not None and ordinal is None:
+                raise ValueError(f"Format de date invalide: {value}")
+            bounds.append(None if ordinal is None else ordinal - today)
+        return bounds[0], bounds[1]
+
+    def _candidate_ids(
+        self,
+        location: str | None,
+        category: str | None,
+        zone: str | None,
+        barcode: str | None,
+    ) -> Iterable[str]:
+        """Return the IDs of the most selective index for the given filters (a superset)."""
+        if barcode is not None:
+            return self._index_barcode.get(barcode, {})
+        if location is not None and category is not None:
+            return self._index_category.get((location, category), {})
+        if location is not None and zone is not None:
+            return self._index_zone.get((location, zone), {})
+        if location is not None:
+            return self._index_location.get(location, {})
+        return self._products
 
     async def async_add_category(self, name: str, location: str = STORAGE_FREEZER) -> None:
         """Add a new category for a specific location."""
@@ -742,6 +1976,9 @@ class InventoryCoordinator(DataUpdateCoordinator):
             all_categories[location] = categories
             new_data = {**self.entry.options, "categories": all_categories}
             self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+            self._invalidate_category_mapping()
+            self._snapshot_touch_location(location)
+            self._async_publish()
             _LOGGER.info("Added category '%s' to location '%s'", name, location)
 
     async def async_remove_category(self, name: str, location: str = STORAGE_FREEZER) -> None:
@@ -778,12 +2015,17 @@ class InventoryCoordinator(DataUpdateCoordinator):
             all_categories[location] = categories
             new_data = {**self.entry.options, "categories": all_categories}
             self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+            self._invalidate_category_mapping()
+            self._snapshot_touch_location(location)
             
             # Update products in this location that have this category to 'Autre'
-            for product in self._products.values():
-                if product.get("location") == location and product.get("category") == name:
-                    product["category"] = "Autre"
-            await self.async_save_data()
+            for pid in self._ids_by_category(location, name):
+                old_keys = self._index_keys(self._products[pid])
+                self._products[pid].update({"category": "Autre"})
+                self._reindex(pid, old_keys)
+                self._snapshot_touch(pid)
+                self._journal_product("update", pid)
+            self._async_publish()
             _LOGGER.info("Removed category '%s' from location '%s'", name, location)
 
     async def async_rename_category(self, old_name: str, new_name: str, location: str = STORAGE_FREEZER) -> None:
@@ -810,12 +2052,17 @@ class InventoryCoordinator(DataUpdateCoordinator):
             all_categories[location] = categories
             new_data = {**self.entry.options, "categories": all_categories}
             self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+            self._invalidate_category_mapping()
+            self._snapshot_touch_location(location)
             
             # Update products in this location
-            for product in self._products.values():
-                if product.get("location") == location and product.get("category") == old_name:
-                    product["category"] = new_name
-            await self.async_save_data()
+            for pid in self._ids_by_category(location, old_name):
+                old_keys = self._index_keys(self._products[pid])
+                self._products[pid].update({"category": new_name})
+                self._reindex(pid, old_keys)
+                self._snapshot_touch(pid)
+                self._journal_product("update", pid)
+            self._async_publish()
             _LOGGER.info("Renamed category '%s' -> '%s' for location '%s'", old_name, new_name, location)
 
     async def async_add_zone(self, name: str, location: str = STORAGE_FREEZER) -> None:
@@ -841,6 +2088,8 @@ class InventoryCoordinator(DataUpdateCoordinator):
             all_zones[location] = zones
             new_data = {**self.entry.options, "zones": all_zones}
             self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+            self._snapshot_touch_location(location)
+            self._async_publish()
             _LOGGER.info("Added zone '%s' to location '%s'", name, location)
 
     async def async_remove_zone(self, name: str, location: str = STORAGE_FREEZER) -> None:
@@ -872,13 +2121,17 @@ class InventoryCoordinator(DataUpdateCoordinator):
             all_zones[location] = zones
             new_data = {**self.entry.options, "zones": all_zones}
             self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+            self._snapshot_touch_location(location)
             
             # Update products in this location that have this zone to first zone
             first_zone = zones[0] if zones else "Zone 1"
-            for product in self._products.values():
-                if product.get("location") == location and product.get("zone") == name:
-                    product["zone"] = first_zone
-            await self.async_save_data()
+            for pid in self._ids_by_zone(location, name):
+                old_keys = self._index_keys(self._products[pid])
+                self._products[pid].update({"zone": first_zone})
+                self._reindex(pid, old_keys)
+                self._snapshot_touch(pid)
+                self._journal_product("update", pid)
+            self._async_publish()
             _LOGGER.info("Removed zone '%s' from location '%s'", name, location)
 
     async def async_rename_zone(self, old_name: str, new_name: str, location: str = STORAGE_FREEZER) -> None:
@@ -905,12 +2158,16 @@ class InventoryCoordinator(DataUpdateCoordinator):
             all_zones[location] = zones
             new_data = {**self.entry.options, "zones": all_zones}
             self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+            self._snapshot_touch_location(location)
             
             # Update products in this location
-            for product in self._products.values():
-                if product.get("location") == location and product.get("zone") == old_name:
-                    product["zone"] = new_name
-            await self.async_save_data()
+            for pid in self._ids_by_zone(location, old_name):
+                old_keys = self._index_keys(self._products[pid])
+                self._products[pid].update({"zone": new_name})
+                self._reindex(pid, old_keys)
+                self._snapshot_touch(pid)
+                self._journal_product("update", pid)
+            self._async_publish()
             _LOGGER.info("Renamed zone '%s' -> '%s' for location '%s'", old_name, new_name, location)
 
     async def async_reset_categories(self, location: str = STORAGE_FREEZER) -> None:
@@ -930,6 +2187,9 @@ class InventoryCoordinator(DataUpdateCoordinator):
         all_categories[location] = list(DEFAULT_CATEGORIES.get(location, []))
         new_data = {**self.entry.options, "categories": all_categories}
         self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+        self._invalidate_category_mapping()
+        self._snapshot_touch_location(location)
+        self._async_publish()
         _LOGGER.info("Reset categories to default for location '%s'", location)
 
     async def async_reset_zones(self, location: str = STORAGE_FREEZER) -> None:
@@ -949,4 +2209,6 @@ class InventoryCoordinator(DataUpdateCoordinator):
         all_zones[location] = list(DEFAULT_ZONES.get(location, []))
         new_data = {**self.entry.options, "zones": all_zones}
         self.hass.config_entries.async_update_entry(self.entry, options=new_data)
+        self._snapshot_touch_location(location)
+        self._async_publish()
         _LOGGER.info("Reset zones to default for location '%s'", location)
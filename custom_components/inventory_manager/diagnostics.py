@@ -0,0 +1,33 @@
+"""Diagnostics support for Inventory Manager."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import InventoryCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: InventoryCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    sensor_cache = coordinator.sensor_cache_stats
+    reads = sensor_cache["hits"] + sensor_cache["misses"]
+
+    return {
+        "products": len(coordinator.products),
+        "history": len(coordinator.product_history),
+        "invalid_expiry_dates": coordinator.invalid_expiry_count,
+        "storage": coordinator.save_stats,
+        "sensor_updates": coordinator.publish_stats,
+        "sensor_cache": {
+            **sensor_cache,
+            "hit_rate": round(sensor_cache["hits"] / reads, 3) if reads else None,
+        },
+        "category_cache": coordinator.category_cache_stats,
+        "expiry_notifications": coordinator.expiry_notification_stats,
+    }
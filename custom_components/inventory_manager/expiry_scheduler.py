@@ -0,0 +1,154 @@
+"""Schedule of the expiry notifications of each product."""
+from __future__ import annotations
+
+import heapq
+from typing import Any
+
+from .const import EXPIRY_THRESHOLD_URGENT
+
+# Notification transitions of a product, in order (stage 1, 2, 3; 0 = none yet)
+NOTIFICATION_TYPES = ("expires_soon", "expires_today", "expired")
+
+
+def notification_stage(days_until_expiry: int) -> int:
+    """Return the notification stage reached by a product (0 = none yet)."""
+    if days_until_expiry < 0:
+        return 3
+    if days_until_expiry == 0:
+        return 2
+    if days_until_expiry <= EXPIRY_THRESHOLD_URGENT:
+        return 1
+    return 0
+
+
+def _due_day(expiry: int, stage: int) -> int:
+    """Return the day ordinal at which a product expiring on `expiry` reaches `stage`."""
+    return expiry + (-EXPIRY_THRESHOLD_URGENT, 0, 1)[stage - 1]
+
+
+class ExpiryScheduler:
+    """Priority queue of the next notification transition of each product.
+
+    Each dated product has at most one pending transition (expires_soon ->
+    expires_today -> expired), keyed by the day it becomes due: scheduling a
+    product is a heap push, O(log n), and finding the due ones at midnight
+    only pops them. Entries made obsolete by a later change stay in the heap
+    and are skipped when popped.
+
+    `sent` remembers the last transition notified for each product and its
+    expiry date, so a transition is notified once even across restarts; it is
+    reset when the expiry date changes. A product that skipped transitions
+    (added late, Home Assistant stopped for days) is only notified of the
+    stage it has reached.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty schedule."""
+        self._queue: list[tuple[int, str]] = []
+        # Product ID -> (due day, expiry ordinal) of its pending transition
+        self._pending: dict[str, tuple[int, int]] = {}
+        # Product ID -> (expiry ordinal, last stage notified)
+        self.sent: dict[str, tuple[int, int]] = {}
+        # Set when `sent` changed since the last call to as_dict()
+        self.dirty = False
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return the number of pending transitions, heap entries and sent notifications."""
+        return {"pending": len(self._pending), "queued": len(self._queue), "sent": len(self.sent)}
+
+    def load(self, state: dict[str, Any] | None) -> None:
+        """Restore the sent notifications from their stored form."""
+        self.sent = {}
+        for product_id, value in ((state or {}).get("sent") or {}).items():
+            try:
+                expiry, notification_type = value
+                stage = NOTIFICATION_TYPES.index(notification_type) + 1
+            except (TypeError, ValueError):
+                continue
+            self.sent[product_id] = (expiry, stage)
+        self.dirty = False
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stored form of the sent notifications."""
+        self.dirty = False
+        return {
+            "sent": {
+                product_id: [expiry, NOTIFICATION_TYPES[stage - 1]]
+                for product_id, (expiry, stage) in self.sent.items()
+            }
+        }
+
+    def rebuild(self, expiries: dict[str, int | None]) -> None:
+        """Schedule every product from scratch (load, import, reset), in O(n)."""
+        sent = {
+            product_id: state
+            for product_id, state in self.sent.items()
+            if expiries.get(product_id) == state[0]
+        }
+        self.dirty = self.dirty or len(sent) != len(self.sent)
+        self.sent = sent
+        self._pending = {}
+        for product_id, expiry in expiries.items():
+            if expiry is not None:
+                self._set_pending(product_id, expiry)
+        self._queue = [(due, product_id) for product_id, (due, _) in self._pending.items()]
+        heapq.heapify(self._queue)
+
+    def schedule(self, product_id: str, expiry: int | None) -> None:
+        """(Re)schedule a product after it was added or its expiry date changed."""
+        state = self.sent.get(product_id)
+        if state is not None and state[0] != expiry:
+            # New expiry date: its transitions are notified again
+            del self.sent[product_id]
+            self.dirty = True
+        pending = self._pending.pop(product_id, None)
+        if expiry is None:
+            return
+        self._set_pending(product_id, expiry)
+        if self._pending.get(product_id) not in (None, pending):
+            heapq.heappush(self._queue, (self._pending[product_id][0], product_id))
+        self._compact()
+
+    def discard(self, product_id: str) -> None:
+        """Forget a removed product."""
+        self._pending.pop(product_id, None)
+        if self.sent.pop(product_id, None) is not None:
+            self.dirty = True
+
+    def pop_due(self, today: int) -> list[tuple[str, int, str]]:
+        """Return the transitions due by `today` as (product ID, days until expiry, type).
+
+        They are marked as sent and the following transition of each product
+        is scheduled.
+        """
+        due: list[tuple[str, int, str]] = []
+        while self._queue and self._queue[0][0] <= today:
+            day, product_id = heapq.heappop(self._queue)
+            pending = self._pending.get(product_id)
+            if pending is None or pending[0] != day:
+                continue
+            expiry = pending[1]
+            del self._pending[product_id]
+            stage = notification_stage(expiry - today)
+            self.sent[product_id] = (expiry, stage)
+            self.dirty = True
+            due.append((product_id, expiry - today, NOTIFICATION_TYPES[stage - 1]))
+            if self._set_pending(product_id, expiry):
+                heapq.heappush(self._queue, (self._pending[product_id][0], product_id))
+        return due
+
+    def _set_pending(self, product_id: str, expiry: int) -> bool:
+        """Record the next transition of a product not notified yet (False if none left)."""
+        state = self.sent.get(product_id)
+        stage = state[1] if state is not None and state[0] == expiry else 0
+        if stage >= len(NOTIFICATION_TYPES):
+            return False
+        self._pending[product_id] = (_due_day(expiry, stage + 1), expiry)
+        return True
+
+    def _compact(self) -> None:
+        """Drop obsolete heap entries once they outnumber the pending ones."""
+        if len(self._queue) > 2 * len(self._pending) + 64:
+            self._queue = [(due, product_id) for product_id, (due, _) in self._pending.items()]
+            heapq.heapify(self._queue)
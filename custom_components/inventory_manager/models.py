@@ -0,0 +1,269 @@
+"""In-memory product record for Inventory Manager."""
+from __future__ import annotations
+
+import bisect
+import sys
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, replace
+from datetime import date, datetime
+from types import MappingProxyType
+from typing import Any
+
+from .const import EXPIRING_SOON_DAYS
+
+# Marks an optional field absent from the stored product (kept distinct from None
+# so that to_dict() gives back exactly the dict passed to from_dict())
+_MISSING: Any = object()
+
+# Stored fields, in the order they are written
+FIELDS = (
+    "name",
+    "expiry_date",
+    "location",
+    "quantity",
+    "category",
+    "zone",
+    "added_date",
+    "barcode",
+    "brand",
+    "image_url",
+)
+
+# Repeated across products: interned so every record shares the same string
+INTERNED_FIELDS = frozenset({"location", "category", "zone"})
+
+
+def parse_expiry(expiry_date: Any) -> int | None:
+    """Return the date ordinal of an ISO expiry date (None if missing or invalid)."""
+    if not expiry_date:
+        return None
+    try:
+        return datetime.fromisoformat(expiry_date).date().toordinal()
+    except (ValueError, TypeError):
+        return None
+
+
+def canonical_expiry(expiry_date: Any) -> str | None:
+    """Return an expiry date as YYYY-MM-DD (None if missing or invalid)."""
+    ordinal = parse_expiry(expiry_date)
+    return None if ordinal is None else date.fromordinal(ordinal).isoformat()
+
+
+class Product:
+    """A product of the inventory.
+
+    Uses __slots__ instead of a dict per product; unknown keys (imported or
+    legacy data) are kept in `extra` so the conversion to/from dict is lossless.
+    The expiry date is parsed once, when it is set, into `expiry_ordinal`.
+    """
+
+    __slots__ = (*FIELDS, "expiry_ordinal", "extra")
+
+    def __init__(self, data: dict[str, Any] | None = None) -> None:
+        """Initialize the product from its stored dict."""
+        for field in FIELDS:
+            setattr(self, field, _MISSING)
+        self.expiry_ordinal: int | None = None
+        self.extra: dict[str, Any] | None = None
+        if data:
+            self.update(data)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Product:
+        """Create a product from its stored dict."""
+        return cls(data)
+
+    def update(self, data: dict[str, Any]) -> None:
+        """Set fields from a dict (interning repeated strings, parsing the expiry)."""
+        for key, value in data.items():
+            if key in INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            if key in FIELDS:
+                setattr(self, key, value)
+                if key == "expiry_date":
+                    self.expiry_ordinal = parse_expiry(value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        """Remove a field and return its value."""
+        if key in FIELDS:
+            value = getattr(self, key)
+            setattr(self, key, _MISSING)
+            if key == "expiry_date":
+                self.expiry_ordinal = None
+            return default if value is _MISSING else value
+        if self.extra is None:
+            return default
+        return self.extra.pop(key, default)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return a field like dict.get()."""
+        if key in FIELDS:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        if self.extra is None:
+            return default
+        return self.extra.get(key, default)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the stored dict of the product."""
+        data = {}
+        for field in FIELDS:
+            value = getattr(self, field)
+            if value is not _MISSING:
+                data[field] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    def __eq__(self, other: object) -> bool:
+        """Compare two products by their stored fields."""
+        if not isinstance(other, Product):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        """Return the representation of the product."""
+        return f"Product({self.to_dict()!r})"
+
+
+# (days until expiry or None if undated, product ID, product)
+ProductEntry = tuple[int | None, str, Product]
+
+# Keys of the snapshot slices read by the sensors (see InventorySnapshot.versions)
+SLICE_TOTAL = "total"
+SLICE_EXPIRED = "expired"
+SLICE_EXPIRING = "expiring"
+
+
+def location_slice(location: str) -> str:
+    """Return the key of the products slice of a location."""
+    return f"location:{location}"
+
+
+def expired_slice(location: str) -> str:
+    """Return the key of the expired products slice of a location."""
+    return f"expired:{location}"
+
+
+def entry_slices(location: str, days: int | None) -> list[str]:
+    """Return the keys of the slices listing a product (total count excluded)."""
+    keys = [location_slice(location)]
+    if days is not None and days < 0:
+        keys += [SLICE_EXPIRED, expired_slice(location)]
+    elif days is not None and days <= EXPIRING_SOON_DAYS:
+        keys.append(SLICE_EXPIRING)
+    return keys
+
+
+def _entry_key(entry: ProductEntry) -> tuple:
+    """Sort key of an entry: by expiry then product ID, undated entries last."""
+    return (entry[0] is None, entry[0] or 0, entry[1])
+
+
+def _insert(entries: tuple[ProductEntry, ...], entry: ProductEntry) -> tuple[ProductEntry, ...]:
+    """Return the entries with `entry` inserted at its sorted position.
+
+    The position is found by bisection but the tuple is copied, so this is O(n).
+    """
+    if entry[0] is None:
+        return (*entries, entry)
+    pos = bisect.bisect_left(entries, _entry_key(entry), key=_entry_key)
+    return entries[:pos] + (entry,) + entries[pos:]
+
+
+def _delete(
+    entries: tuple[ProductEntry, ...], days: int | None, product_id: str
+) -> tuple[ProductEntry, ...]:
+    """Return the entries without the entry of `product_id`."""
+    if days is None:
+        # Undated entries are not sorted: look for it from the end
+        pos = next(
+            (i for i in range(len(entries) - 1, -1, -1) if entries[i][1] == product_id),
+            len(entries),
+        )
+    else:
+        pos = bisect.bisect_left(entries, (False, days, product_id), key=_entry_key)
+    if pos < len(entries) and entries[pos][1] == product_id:
+        return entries[:pos] + entries[pos + 1:]
+    return entries
+
+
+@dataclass(frozen=True, slots=True)
+class InventorySnapshot:
+    """Inventory state shared by all sensors for one data generation.
+
+    Built in full on load, import and at each day rollover; a mutation
+    derives the next snapshot with with_entry()/without_entry(), sharing the
+    unchanged tuples. Every list is sorted by expiry date (soonest first, then
+    product ID), undated products last.
+
+    `versions` maps each slice key (SLICE_TOTAL, location_slice(), ...) to a
+    counter bumped whenever the slice changes, so a sensor only writes its
+    state when the slice it shows changed.
+    """
+
+    today: int
+    total: int
+    locations: Mapping[str, tuple[ProductEntry, ...]]
+    expired: tuple[ProductEntry, ...]
+    expired_by_location: Mapping[str, tuple[ProductEntry, ...]]
+    expiring: tuple[ProductEntry, ...]
+    versions: Mapping[str, int]
+
+    def touch(self, keys: Iterable[str]) -> InventorySnapshot:
+        """Return the snapshot with the given slices marked as changed."""
+        return replace(self, versions=self._bumped(keys))
+
+    def _bumped(self, keys: Iterable[str]) -> Mapping[str, int]:
+        """Return the versions with the given slices bumped."""
+        versions = dict(self.versions)
+        for key in keys:
+            versions[key] = versions.get(key, 0) + 1
+        return MappingProxyType(versions)
+
+    def with_entry(self, location: str, entry: ProductEntry) -> InventorySnapshot:
+        """Return a new snapshot including a product (bisect insertions)."""
+        days = entry[0]
+        changes: dict[str, Any] = {
+            "total": self.total + 1,
+            "versions": self._bumped([SLICE_TOTAL, *entry_slices(location, days)]),
+            "locations": MappingProxyType(
+                {**self.locations, location: _insert(self.locations.get(location, ()), entry)}
+            ),
+        }
+        if days is not None and days < 0:
+            changes["expired"] = _insert(self.expired, entry)
+            changes["expired_by_location"] = MappingProxyType({
+                **self.expired_by_location,
+                location: _insert(self.expired_by_location.get(location, ()), entry),
+            })
+        elif days is not None and days <= EXPIRING_SOON_DAYS:
+            changes["expiring"] = _insert(self.expiring, entry)
+        return replace(self, **changes)
+
+    def without_entry(
+        self, location: str, days: int | None, product_id: str
+    ) -> InventorySnapshot:
+        """Return a new snapshot without a product (bisect lookups)."""
+        entries = self.locations.get(location, ())
+        remaining = _delete(entries, days, product_id)
+        if len(remaining) == len(entries):
+            return self
+        changes: dict[str, Any] = {
+            "total": self.total - 1,
+            "versions": self._bumped([SLICE_TOTAL, *entry_slices(location, days)]),
+            "locations": MappingProxyType({**self.locations, location: remaining}),
+        }
+        if days is not None and days < 0:
+            changes["expired"] = _delete(self.expired, days, product_id)
+            changes["expired_by_location"] = MappingProxyType({
+                **self.expired_by_location,
+                location: _delete(self.expired_by_location.get(location, ()), days, product_id),
+            })
+        elif days is not None and days <= EXPIRING_SOON_DAYS:
+            changes["expiring"] = _delete(self.expiring, days, product_id)
+        return replace(self, **changes)
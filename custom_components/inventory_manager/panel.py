@@ -2,15 +2,23 @@
 from __future__ import annotations
 
 import json
+import zlib
 from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 from aiohttp import web
 from homeassistant.components import panel_custom
 from homeassistant.components.http import HomeAssistantView
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, STORAGE_FREEZER, STORAGE_FRIDGE, STORAGE_PANTRY
+from .const import (
+    DOMAIN,
+    EXPORT_BATCH_SIZE,
+    STORAGE_FREEZER,
+    STORAGE_FRIDGE,
+    STORAGE_PANTRY,
+)
 
 PANEL_TITLE = "Inventaire"
 PANEL_ICON = "mdi:fridge-industrial-outline"
@@ -82,18 +90,61 @@ def _json_default(obj: object) -> str:
     return str(obj)
 
 
+def _dumps(obj: object) -> str:
+    """Serialize one value of the export."""
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+def _encode(text: str, compressor: Any | None) -> bytes:
+    """Encode a piece of the export, gzip-compressed if requested."""
+    data = text.encode("utf-8")
+    return data if compressor is None else compressor.compress(data)
+
+
+def _export_products_chunk(
+    products: list[dict[str, Any]], first: bool, compressor: Any | None
+) -> bytes:
+    """Serialize a batch of products, one per line (run in the executor)."""
+    text = ",\n".join(f"      {_dumps(product)}" for product in products)
+    return _encode(text if first else ",\n" + text, compressor)
+
+
+def _export_tail_chunk(
+    product_history: list[dict[str, Any]],
+    categories: dict[str, Any],
+    zones: dict[str, Any],
+    compressor: Any | None,
+) -> bytes:
+    """Serialize the end of the export and flush the compressor (run in the executor)."""
+    data = _encode(
+        "\n    ]\n  },\n"
+        f'  "product_history": {_dumps(product_history)},\n'
+        f'  "categories": {_dumps(categories)},\n'
+        f'  "zones": {_dumps(zones)}\n'
+        "}\n",
+        compressor,
+    )
+    return data if compressor is None else data + compressor.flush()
+
+
 class InventoryManagerExportView(HomeAssistantView):
     """Serve inventory data as a downloadable JSON file.
 
     Content-Disposition: attachment triggers Android's download manager,
     which is the only reliable way to download files from a WebView.
+
+    The file is streamed (chunked): products are serialized per location and
+    per batch of EXPORT_BATCH_SIZE in the executor, so a large inventory
+    neither blocks the event loop nor is held in memory as one JSON string.
+    With ?gzip=1 it is compressed on the fly (.json.gz). The content is the
+    export schema accepted by import_data, one product per line.
     """
 
     url = "/inventory_manager/export"
     name = "inventory_manager_export"
     requires_auth = True
 
-    async def get(self, request: web.Request) -> web.Response:
+    async def get(self, request: web.Request) -> web.StreamResponse:
         try:
             hass = request.app["hass"]
 
@@ -111,13 +162,14 @@ class InventoryManagerExportView(HomeAssistantView):
                     content_type="text/plain",
                 )
 
-            version = _get_version()
             locations = {
                 STORAGE_FREEZER: "freezer",
                 STORAGE_FRIDGE: "fridge",
                 STORAGE_PANTRY: "pantry",
             }
 
+            # Copy everything on the event loop first: the export is a
+            # consistent snapshot even if the inventory changes while streaming
             products_by_loc = {}
             categories_by_loc = {}
             zones_by_loc = {}
@@ -125,30 +177,11 @@ class InventoryManagerExportView(HomeAssistantView):
                 products_by_loc[label] = coordinator.get_products_by_location(key)
                 categories_by_loc[label] = coordinator.get_categories(key)
                 zones_by_loc[label] = coordinator.get_zones(key)
+            product_history = list(coordinator.product_history)
 
-            export_data = {
-                "version": version,
-                "export_date": datetime.now().isoformat(),
-                "products": products_by_loc,
-                "product_history": coordinator.product_history,
-                "categories": categories_by_loc,
-                "zones": zones_by_loc,
-            }
-
+            use_gzip = request.query.get("gzip") in ("1", "true")
             date_str = datetime.now().strftime("%Y-%m-%d")
-            filename = f"inventory_backup_{date_str}.json"
-
-            body = json.dumps(
-                export_data, ensure_ascii=False, indent=2, default=_json_default
-            )
-
-            return web.Response(
-                body=body.encode("utf-8"),
-                content_type="application/json",
-                headers={
-                    "Content-Disposition": f'attachment; filename="{filename}"',
-                },
-            )
+            filename = f"inventory_backup_{date_str}.json" + (".gz" if use_gzip else "")
         except Exception:
             import traceback
             return web.Response(
@@ -157,6 +190,45 @@ class InventoryManagerExportView(HomeAssistantView):
                 content_type="text/plain",
             )
 
+        response = web.StreamResponse(
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+        response.content_type = "application/gzip" if use_gzip else "application/json"
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        # gzip container (wbits=31), fed sequentially by the executor jobs below
+        compressor = zlib.compressobj(wbits=31) if use_gzip else None
+        await response.write(
+            _encode(
+                "{\n"
+                f'  "version": {_dumps(_VERSION)},\n'
+                f'  "export_date": {_dumps(datetime.now().isoformat())},\n'
+                '  "products": {',
+                compressor,
+            )
+        )
+        for index, (label, products) in enumerate(products_by_loc.items()):
+            await response.write(
+                _encode(("\n    ]," if index else "") + f"\n    {_dumps(label)}: [\n", compressor)
+            )
+            for start in range(0, len(products), EXPORT_BATCH_SIZE):
+                chunk = await hass.async_add_executor_job(
+                    _export_products_chunk,
+                    products[start:start + EXPORT_BATCH_SIZE],
+                    start == 0,
+                    compressor,
+                )
+                if chunk:
+                    await response.write(chunk)
+        await response.write(
+            await hass.async_add_executor_job(
+                _export_tail_chunk, product_history, categories_by_loc, zones_by_loc, compressor
+            )
+        )
+        await response.write_eof()
+        return response
+
 
 _VIEWS_REGISTERED_KEY = DOMAIN + "_views_registered"
 
@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import logging
-from datetime import datetime
 from typing import Any
 
 from homeassistant.components.sensor import (
@@ -13,7 +12,6 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
@@ -21,6 +19,13 @@ from .const import (
     STORAGE_LOCATIONS,
 )
 from .coordinator import InventoryCoordinator
+from .models import (
+    SLICE_EXPIRED,
+    SLICE_EXPIRING,
+    SLICE_TOTAL,
+    expired_slice,
+    location_slice,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -52,8 +57,15 @@ async def async_setup_entry(
     async_add_entities(entities)
 
 
-class InventoryBaseSensor(CoordinatorEntity, SensorEntity):
-    """Base sensor for inventory."""
+class InventoryBaseSensor(CoordinatorEntity[InventoryCoordinator], SensorEntity):
+    """Base sensor for inventory.
+
+    Each sensor shows one slice of the coordinator snapshot (`slice_key`) and
+    only writes its state when that slice's version changed: a fridge edit
+    does not re-serialise the pantry products. The value and attributes are
+    built once per slice version and day, then returned from cache on every
+    read by Home Assistant.
+    """
 
     def __init__(
         self,
@@ -61,15 +73,60 @@ class InventoryBaseSensor(CoordinatorEntity, SensorEntity):
         entry: ConfigEntry,
         sensor_type: str,
         name: str,
+        slice_key: str,
     ) -> None:
         """Initialize the sensor."""
         super().__init__(coordinator)
         self._entry = entry
         self._sensor_type = sensor_type
+        self._slice_key = slice_key
+        self._slice_version: int | None = None
+        self._payload_key: tuple | None = None
+        self._payload: tuple[Any, dict[str, Any]] | None = None
         self._attr_name = name
         self._attr_unique_id = f"{entry.entry_id}_{sensor_type}"
         self._attr_has_entity_name = True
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only if the slice shown by the sensor changed."""
+        version = self.coordinator.data.versions.get(self._slice_key)
+        if version is not None and version == self._slice_version:
+            return
+        self._slice_version = version
+        super()._handle_coordinator_update()
+
+    def _cached_payload(self) -> tuple[Any, dict[str, Any]]:
+        """Return the value and attributes, rebuilt only when the slice or the day changed."""
+        data = self.coordinator.data
+        key = (data.versions.get(self._slice_key), data.today)
+        stats = self.coordinator.sensor_cache_stats
+        if self._payload is None or key != self._payload_key:
+            self._payload = (self._build_value(), self._build_attributes())
+            self._payload_key = key
+            stats["misses"] += 1
+        else:
+            stats["hits"] += 1
+        return self._payload
+
+    def _build_value(self) -> Any:
+        """Compute the state of the sensor."""
+        raise NotImplementedError
+
+    def _build_attributes(self) -> dict[str, Any]:
+        """Compute the attributes of the sensor."""
+        return {}
+
+    @property
+    def native_value(self) -> Any:
+        """Return the state of the sensor."""
+        return self._cached_payload()[0]
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return additional attributes."""
+        return self._cached_payload()[1]
+
     @property
     def device_info(self) -> dict[str, Any]:
         """Return device info."""
@@ -100,17 +157,16 @@ class InventoryTotalSensor(InventoryBaseSensor):
             entry,
             "total_products",
             "Total Produits",
+            SLICE_TOTAL,
         )
         self._attr_icon = "mdi:package-variant"
         self._attr_native_unit_of_measurement = "produits"
 
-    @property
-    def native_value(self) -> int:
+    def _build_value(self) -> int:
         """Return the total number of products."""
-        return len(self.coordinator.products)
+        return self.coordinator.data.total
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _build_attributes(self) -> dict[str, Any]:
         """Return additional attributes."""
         # Only expose product_history (used for autocomplete).
         # The full products list is redundant with location sensors and causes
@@ -149,6 +205,7 @@ class InventoryLocationSensor(InventoryBaseSensor):
             entry,
             f"location_{location_key}",
             location_name,
+            location_slice(location_key),
         )
         self._location_key = location_key
         self._attr_native_unit_of_measurement = "produits"
@@ -161,39 +218,26 @@ class InventoryLocationSensor(InventoryBaseSensor):
         }
         self._attr_icon = icons.get(location_key, "mdi:package-variant")
 
-    @property
-    def native_value(self) -> int:
+    def _build_value(self) -> int:
         """Return the number of products in this location."""
-        return len(self.coordinator.get_products_by_location(self._location_key))
+        return len(self.coordinator.data.locations.get(self._location_key, ()))
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _build_attributes(self) -> dict[str, Any]:
         """Return additional attributes."""
-        products = self.coordinator.get_products_by_location(self._location_key)
-        now = dt_util.now().date()
-        
-        # Sort by expiry date
-        sorted_products = []
-        for p in products:
-            expiry_str = p.get("expiry_date") or ""
-            try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                days_until = (expiry_date - now).days
-            except (ValueError, TypeError):
-                days_until = 999
-            
-            sorted_products.append({
-                "id": p.get("id"),
+        # Already sorted by expiry date (undated products last, shown as 999 days)
+        sorted_products = [
+            {
+                "id": pid,
                 "name": p.get("name", "Inconnu"),
-                "expiry_date": expiry_str,
-                "days_until_expiry": days_until,
+                "expiry_date": p.get("expiry_date") or "",
+                "days_until_expiry": 999 if days_until is None else days_until,
                 "quantity": p.get("quantity", 1),
                 "category": p.get("category", "Autre"),
                 "zone": p.get("zone", "Zone 1"),
                 "barcode": p.get("barcode", ""),
-            })
-        
-        sorted_products.sort(key=lambda x: x["days_until_expiry"])
+            }
+            for days_until, pid, p in self.coordinator.data.locations.get(self._location_key, ())
+        ]
         
         return {
             "products": sorted_products,
@@ -218,30 +262,28 @@ class InventoryExpiringSensor(InventoryBaseSensor):
             entry,
             "expiring_soon",
             "Produits Périmant Bientôt",
+            SLICE_EXPIRING,
         )
         self._attr_icon = "mdi:clock-alert-outline"
         self._attr_native_unit_of_measurement = "produits"
 
-    @property
-    def native_value(self) -> int:
+    def _build_value(self) -> int:
         """Return the number of products expiring soon."""
-        return len(self.coordinator.get_expiring_products(days=7))
+        return len(self.coordinator.data.expiring)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _build_attributes(self) -> dict[str, Any]:
         """Return additional attributes."""
-        expiring = self.coordinator.get_expiring_products(days=7)
         return {
             "products": [
                 {
-                    "id": p.get("id"),
+                    "id": pid,
                     "name": p.get("name", "Inconnu"),
                     "expiry_date": p.get("expiry_date", ""),
-                    "days_until_expiry": p.get("days_until_expiry", 0),
+                    "days_until_expiry": days_until,
                     "location": STORAGE_LOCATIONS.get(p.get("location", ""), p.get("location", "")),
                     "quantity": p.get("quantity", 1),
                 }
-                for p in expiring
+                for days_until, pid, p in self.coordinator.data.expiring
             ],
         }
 
@@ -260,57 +302,30 @@ class InventoryExpiredSensor(InventoryBaseSensor):
             entry,
             "expired",
             "Produits Périmés",
+            SLICE_EXPIRED,
         )
         self._attr_icon = "mdi:alert-circle-outline"
         self._attr_native_unit_of_measurement = "produits"
 
-    @property
-    def native_value(self) -> int:
+    def _build_value(self) -> int:
         """Return the number of expired products."""
-        now = dt_util.now().date()
-        count = 0
-        
-        for product in self.coordinator.products.values():
-            expiry_str = product.get("expiry_date")
-            if not expiry_str:
-                continue
-            try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                if expiry_date < now:
-                    count += 1
-            except ValueError:
-                continue
-        
-        return count
+        return len(self.coordinator.data.expired)
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _build_attributes(self) -> dict[str, Any]:
         """Return additional attributes."""
-        now = dt_util.now().date()
-        expired = []
-        
-        for pid, product in self.coordinator.products.items():
-            expiry_str = product.get("expiry_date")
-            if not expiry_str:
-                continue
-            try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                if expiry_date < now:
-                    days_expired = (now - expiry_date).days
-                    expired.append({
-                        "id": pid,
-                        "name": product.get("name", "Inconnu"),
-                        "expiry_date": expiry_str,
-                        "days_expired": days_expired,
-                        "location": STORAGE_LOCATIONS.get(product.get("location", ""), product.get("location", "")),
-                        "quantity": product.get("quantity", 1),
-                    })
-            except ValueError:
-                continue
-        
-        expired.sort(key=lambda x: x["days_expired"], reverse=True)
-        
-        return {"products": expired}
+        return {
+            "products": [
+                {
+                    "id": pid,
+                    "name": p.get("name", "Inconnu"),
+                    "expiry_date": p.get("expiry_date"),
+                    "days_expired": -days_until,
+                    "location": STORAGE_LOCATIONS.get(p.get("location", ""), p.get("location", "")),
+                    "quantity": p.get("quantity", 1),
+                }
+                for days_until, pid, p in self.coordinator.data.expired
+            ],
+        }
 
 
 class InventoryLocationExpiredSensor(InventoryBaseSensor):
@@ -329,61 +344,31 @@ class InventoryLocationExpiredSensor(InventoryBaseSensor):
             entry,
             f"expired_{location}",
             f"Produits Périmés - {location_name}",
+            expired_slice(location),
         )
         self._location = location
         self._location_name = location_name
         self._attr_icon = "mdi:alert-circle-outline"
         self._attr_native_unit_of_measurement = "produits"
 
-    @property
-    def native_value(self) -> int:
+    def _build_value(self) -> int:
         """Return the number of expired products for this location."""
-        now = dt_util.now().date()
-        count = 0
-        
-        for product in self.coordinator.products.values():
-            if product.get("location") != self._location:
-                continue
-            expiry_str = product.get("expiry_date")
-            if not expiry_str:
-                continue
-            try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                if expiry_date < now:
-                    count += 1
-            except ValueError:
-                continue
-        
-        return count
+        return len(self.coordinator.data.expired_by_location.get(self._location, ()))
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
+    def _build_attributes(self) -> dict[str, Any]:
         """Return additional attributes."""
-        now = dt_util.now().date()
-        expired = []
-        
-        for pid, product in self.coordinator.products.items():
-            if product.get("location") != self._location:
-                continue
-            expiry_str = product.get("expiry_date")
-            if not expiry_str:
-                continue
-            try:
-                expiry_date = datetime.fromisoformat(expiry_str).date()
-                if expiry_date < now:
-                    days_expired = (now - expiry_date).days
-                    expired.append({
-                        "id": pid,
-                        "name": product.get("name", "Inconnu"),
-                        "expiry_date": expiry_str,
-                        "days_expired": days_expired,
-                        "location": self._location_name,
-                        "quantity": product.get("quantity", 1),
-                    })
-            except ValueError:
-                continue
-        
-        expired.sort(key=lambda x: x["days_expired"], reverse=True)
-        
-        return {"products": expired}
-
+        return {
+            "products": [
+                {
+                    "id": pid,
+                    "name": p.get("name", "Inconnu"),
+                    "expiry_date": p.get("expiry_date"),
+                    "days_expired": -days_until,
+                    "location": self._location_name,
+                    "quantity": p.get("quantity", 1),
+                }
+                for days_until, pid, p in self.coordinator.data.expired_by_location.get(
+                    self._location, ()
+                )
+            ],
+        }
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime
+from typing import Any
 
 import voluptuous as vol
 
@@ -14,9 +15,12 @@ from .const import (
     SERVICE_SCAN_PRODUCT,
     SERVICE_LOOKUP_PRODUCT,
     SERVICE_ADD_PRODUCT,
+    SERVICE_ADD_PRODUCTS,
     SERVICE_REMOVE_PRODUCT,
+    SERVICE_REMOVE_PRODUCTS,
     SERVICE_UPDATE_QUANTITY,
     SERVICE_UPDATE_PRODUCT,
+    SERVICE_UPDATE_PRODUCTS,
     SERVICE_LIST_PRODUCTS,
     SERVICE_ADD_CATEGORY,
     SERVICE_REMOVE_CATEGORY,
@@ -28,6 +32,7 @@ from .const import (
     SERVICE_RESET_ZONES,    SERVICE_EXPORT_DATA,
     SERVICE_IMPORT_DATA,    SERVICE_EXPORT_DATA,
     SERVICE_IMPORT_DATA,
+    SERVICE_BATCH,
     ATTR_BARCODE,
     ATTR_NAME,
     ATTR_QUANTITY,
@@ -38,12 +43,33 @@ from .const import (
     ATTR_ZONE,
     ATTR_OLD_NAME,
     ATTR_NEW_NAME,
+    ATTR_PRODUCTS,
+    ATTR_EXPIRED,
+    ATTR_EXPIRY_FROM,
+    ATTR_EXPIRY_TO,
+    ATTR_CHANGES,
+    ATTR_OPERATIONS,
+    ATTR_OP,
+    ATTR_SORT_BY,
+    ATTR_ORDER,
+    ATTR_LIMIT,
+    ATTR_OFFSET,
+    ATTR_CURSOR,
+    ATTR_FIELDS,
+    LIST_SORT_KEYS,
+    LIST_MAX_LIMIT,
+    BATCH_OP_ADD,
+    BATCH_OP_UPDATE,
+    BATCH_OP_REMOVE,
+    BATCH_OP_QUANTITY,
+    BATCH_OPERATIONS,
     STORAGE_FREEZER,
     STORAGE_FRIDGE,
     STORAGE_PANTRY,
     STORAGE_LOCATIONS,
 )
-from .coordinator import InventoryCoordinator
+from .coordinator import BatchOperationError, InventoryCoordinator
+from .models import FIELDS
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -86,6 +112,34 @@ ADD_PRODUCT_SCHEMA = vol.Schema(
     }
 )
 
+# A product to add in a list (add_products, batch): a name or a barcode to look up
+PRODUCT_ITEM_FIELDS = {
+    vol.Optional(ATTR_NAME): vol.All(cv.string, vol.Length(min=1)),
+    vol.Optional(ATTR_BARCODE): cv.string,
+    vol.Optional(ATTR_EXPIRY_DATE): cv.string,
+    vol.Optional(ATTR_LOCATION, default=STORAGE_FREEZER): vol.In(
+        [STORAGE_FREEZER, STORAGE_FRIDGE, STORAGE_PANTRY]
+    ),
+    vol.Optional(ATTR_QUANTITY, default=1): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    vol.Optional(ATTR_CATEGORY): cv.string,
+    vol.Optional(ATTR_ZONE): cv.string,
+}
+
+ADD_PRODUCTS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_PRODUCTS): vol.All(
+            cv.ensure_list,
+            vol.Length(min=1),
+            [
+                vol.All(
+                    cv.has_at_least_one_key(ATTR_NAME, ATTR_BARCODE),
+                    vol.Schema(PRODUCT_ITEM_FIELDS),
+                )
+            ],
+        ),
+    }
+)
+
 REMOVE_PRODUCT_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_PRODUCT_ID): cv.string,
@@ -102,6 +156,18 @@ UPDATE_QUANTITY_SCHEMA = vol.Schema(
 LIST_PRODUCTS_SCHEMA = vol.Schema(
     {
         vol.Optional(ATTR_LOCATION): vol.In([STORAGE_FREEZER, STORAGE_FRIDGE, STORAGE_PANTRY]),
+        vol.Optional(ATTR_CATEGORY): cv.string,
+        vol.Optional(ATTR_ZONE): cv.string,
+        vol.Optional(ATTR_BARCODE): cv.string,
+        vol.Optional(ATTR_NAME): cv.string,
+        vol.Optional(ATTR_EXPIRY_FROM): cv.string,
+        vol.Optional(ATTR_EXPIRY_TO): cv.string,
+        vol.Optional(ATTR_SORT_BY, default="expiry_date"): vol.In(LIST_SORT_KEYS),
+        vol.Optional(ATTR_ORDER, default="asc"): vol.In(["asc", "desc"]),
+        vol.Optional(ATTR_LIMIT): vol.All(vol.Coerce(int), vol.Range(min=1, max=LIST_MAX_LIMIT)),
+        vol.Optional(ATTR_OFFSET, default=0): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        vol.Optional(ATTR_CURSOR): cv.string,
+        vol.Optional(ATTR_FIELDS): vol.All(cv.ensure_list, [vol.In(["id", *FIELDS])]),
     }
 )
 
@@ -116,6 +182,105 @@ UPDATE_PRODUCT_SCHEMA = vol.Schema(
     }
 )
 
+# Products targeted by the bulk services: explicit IDs, or filters combined with AND
+PRODUCT_FILTER_KEYS = (
+    ATTR_LOCATION,
+    ATTR_CATEGORY,
+    ATTR_ZONE,
+    ATTR_EXPIRED,
+    ATTR_EXPIRY_FROM,
+    ATTR_EXPIRY_TO,
+)
+
+PRODUCT_SELECTION_FIELDS = {
+    vol.Optional(ATTR_PRODUCT_ID): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_LOCATION): vol.In([STORAGE_FREEZER, STORAGE_FRIDGE, STORAGE_PANTRY]),
+    vol.Optional(ATTR_CATEGORY): cv.string,
+    vol.Optional(ATTR_ZONE): cv.string,
+    vol.Optional(ATTR_EXPIRED): cv.boolean,
+    vol.Optional(ATTR_EXPIRY_FROM): cv.string,
+    vol.Optional(ATTR_EXPIRY_TO): cv.string,
+}
+
+REMOVE_PRODUCTS_SCHEMA = vol.All(
+    cv.has_at_least_one_key(ATTR_PRODUCT_ID, *PRODUCT_FILTER_KEYS),
+    vol.Schema(PRODUCT_SELECTION_FIELDS),
+)
+
+UPDATE_PRODUCTS_SCHEMA = vol.All(
+    cv.has_at_least_one_key(ATTR_PRODUCT_ID, *PRODUCT_FILTER_KEYS),
+    vol.Schema(
+        {
+            **PRODUCT_SELECTION_FIELDS,
+            vol.Required(ATTR_CHANGES): vol.All(
+                cv.has_at_least_one_key(
+                    ATTR_NAME, ATTR_EXPIRY_DATE, ATTR_QUANTITY, ATTR_CATEGORY, ATTR_ZONE, ATTR_LOCATION
+                ),
+                vol.Schema(
+                    {
+                        vol.Optional(ATTR_NAME): vol.All(cv.string, vol.Length(min=1)),
+                        vol.Optional(ATTR_EXPIRY_DATE): vol.Any(None, cv.string),
+                        vol.Optional(ATTR_QUANTITY): vol.All(vol.Coerce(int), vol.Range(min=1)),
+                        vol.Optional(ATTR_CATEGORY): cv.string,
+                        vol.Optional(ATTR_ZONE): cv.string,
+                        vol.Optional(ATTR_LOCATION): vol.In(
+                            [STORAGE_FREEZER, STORAGE_FRIDGE, STORAGE_PANTRY]
+                        ),
+                    }
+                ),
+            ),
+        }
+    ),
+)
+
+BATCH_OPERATION_SCHEMAS = {
+    BATCH_OP_ADD: vol.All(
+        cv.has_at_least_one_key(ATTR_NAME, ATTR_BARCODE),
+        vol.Schema({vol.Required(ATTR_OP): BATCH_OP_ADD, **PRODUCT_ITEM_FIELDS}),
+    ),
+    BATCH_OP_UPDATE: vol.Schema(
+        {
+            vol.Required(ATTR_OP): BATCH_OP_UPDATE,
+            vol.Required(ATTR_PRODUCT_ID): cv.string,
+            vol.Optional(ATTR_NAME): vol.All(cv.string, vol.Length(min=1)),
+            vol.Optional(ATTR_EXPIRY_DATE): vol.Any(None, cv.string),
+            vol.Optional(ATTR_QUANTITY): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Optional(ATTR_CATEGORY): cv.string,
+            vol.Optional(ATTR_ZONE): cv.string,
+            vol.Optional(ATTR_LOCATION): vol.In([STORAGE_FREEZER, STORAGE_FRIDGE, STORAGE_PANTRY]),
+        }
+    ),
+    BATCH_OP_REMOVE: vol.Schema(
+        {
+            vol.Required(ATTR_OP): BATCH_OP_REMOVE,
+            vol.Required(ATTR_PRODUCT_ID): cv.string,
+        }
+    ),
+    BATCH_OP_QUANTITY: vol.Schema(
+        {
+            vol.Required(ATTR_OP): BATCH_OP_QUANTITY,
+            vol.Required(ATTR_PRODUCT_ID): cv.string,
+            vol.Required(ATTR_QUANTITY): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        }
+    ),
+}
+
+
+def _batch_operation(value: Any) -> dict:
+    """Validate one batch operation with the schema of its `op`."""
+    if not isinstance(value, dict) or value.get(ATTR_OP) not in BATCH_OPERATION_SCHEMAS:
+        raise vol.Invalid(f"op doit valoir {', '.join(BATCH_OPERATIONS)}")
+    return BATCH_OPERATION_SCHEMAS[value[ATTR_OP]](value)
+
+
+BATCH_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_OPERATIONS): vol.All(
+            cv.ensure_list, vol.Length(min=1), [_batch_operation]
+        ),
+    }
+)
+
 ADD_CATEGORY_SCHEMA = vol.Schema(
     {
         vol.Required(ATTR_NAME): cv.string,
@@ -189,6 +354,39 @@ RESET_ZONES_SCHEMA = vol.Schema(
 )
 
 
+def _normalize_expiry_date(expiry_date: str) -> str:
+    """Return an expiry date in ISO format (YYYY-MM-DD, DD/MM/YYYY or DD-MM-YYYY accepted).
+
+    Raises ValueError if the date cannot be parsed.
+    """
+    try:
+        datetime.fromisoformat(expiry_date)
+        return expiry_date
+    except ValueError:
+        for fmt in ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"]:
+            try:
+                return datetime.strptime(expiry_date, fmt).date().isoformat()
+            except ValueError:
+                continue
+    raise ValueError(f"Format de date invalide: {expiry_date}. Utilisez YYYY-MM-DD")
+
+
+def _select_products(coordinator: InventoryCoordinator, data: dict) -> list[str]:
+    """Return the product IDs targeted by a bulk service call.
+
+    Raises ValueError if both IDs and filters are given or a date is invalid.
+    """
+    filters = {key: data[key] for key in PRODUCT_FILTER_KEYS if key in data}
+    if ATTR_PRODUCT_ID in data:
+        if filters:
+            raise ValueError("Utilisez soit product_id, soit des filtres, pas les deux")
+        return data[ATTR_PRODUCT_ID]
+    for key in (ATTR_EXPIRY_FROM, ATTR_EXPIRY_TO):
+        if key in filters:
+            filters[key] = _normalize_expiry_date(filters[key])
+    return coordinator.select_products(**filters)
+
+
 async def async_setup_services(
     hass: HomeAssistant, coordinator: InventoryCoordinator
 ) -> None:
@@ -309,6 +507,26 @@ async def async_setup_services(
             "name": name,
         }
 
+    async def handle_add_products(call: ServiceCall) -> ServiceResponse:
+        """Handle add products service call (one write and one refresh for the list)."""
+        items = [dict(item) for item in call.data[ATTR_PRODUCTS]]
+
+        # Validate every item before adding anything
+        for index, item in enumerate(items):
+            if item.get(ATTR_EXPIRY_DATE):
+                try:
+                    item[ATTR_EXPIRY_DATE] = _normalize_expiry_date(item[ATTR_EXPIRY_DATE])
+                except ValueError as err:
+                    return {"success": False, "index": index, "error": str(err)}
+
+        product_ids = await coordinator.async_add_products(items)
+
+        return {
+            "success": True,
+            "count": len(product_ids),
+            "product_ids": product_ids,
+        }
+
     async def handle_remove_product(call: ServiceCall) -> ServiceResponse:
         """Handle remove product service call."""
         product_id = call.data[ATTR_PRODUCT_ID]
@@ -320,6 +538,21 @@ async def async_setup_services(
             "product_id": product_id,
         }
 
+    async def handle_remove_products(call: ServiceCall) -> ServiceResponse:
+        """Handle remove products service call (one write and one refresh for all)."""
+        try:
+            product_ids = _select_products(coordinator, call.data)
+        except ValueError as err:
+            return {"success": False, "error": str(err)}
+
+        results = await coordinator.async_remove_products(product_ids)
+
+        return {
+            "success": True,
+            "count": sum(1 for result in results if result["success"]),
+            "results": results,
+        }
+
     async def handle_update_quantity(call: ServiceCall) -> ServiceResponse:
         """Handle update quantity service call."""
         product_id = call.data[ATTR_PRODUCT_ID]
@@ -334,21 +567,38 @@ async def async_setup_services(
         }
 
     async def handle_list_products(call: ServiceCall) -> ServiceResponse:
-        """Handle list products service call."""
-        location = call.data.get(ATTR_LOCATION)
-
-        if location:
-            products = coordinator.get_products_by_location(location)
-        else:
-            products = [
-                {"id": pid, **product}
-                for pid, product in coordinator.products.items()
-            ]
+        """Handle list products service call (filtered, sorted and paginated)."""
+        if ATTR_CURSOR in call.data and call.data[ATTR_OFFSET]:
+            return {"success": False, "error": "Utilisez soit offset, soit cursor, pas les deux"}
+        try:
+            expiry_from, expiry_to = (
+                _normalize_expiry_date(call.data[key]) if key in call.data else None
+                for key in (ATTR_EXPIRY_FROM, ATTR_EXPIRY_TO)
+            )
+            page = await coordinator.async_query_products(
+                location=call.data.get(ATTR_LOCATION),
+                category=call.data.get(ATTR_CATEGORY),
+                zone=call.data.get(ATTR_ZONE),
+                barcode=call.data.get(ATTR_BARCODE),
+                expiry_from=expiry_from,
+                expiry_to=expiry_to,
+                name=call.data.get(ATTR_NAME),
+                sort_by=call.data[ATTR_SORT_BY],
+                descending=call.data[ATTR_ORDER] == "desc",
+                limit=call.data.get(ATTR_LIMIT),
+                offset=call.data[ATTR_OFFSET],
+                cursor=call.data.get(ATTR_CURSOR),
+                fields=call.data.get(ATTR_FIELDS),
+            )
+        except ValueError as err:
+            return {"success": False, "error": str(err)}
 
         return {
             "success": True,
-            "count": len(products),
-            "products": products,
+            "count": len(page["products"]),
+            "total": page["total"],
+            "next_cursor": page["next_cursor"],
+            "products": page["products"],
         }
 
     async def handle_update_product(call: ServiceCall) -> ServiceResponse:
@@ -392,6 +642,46 @@ async def async_setup_services(
             "product_id": product_id,
         }
 
+    async def handle_update_products(call: ServiceCall) -> ServiceResponse:
+        """Handle update products service call (one write and one refresh for all)."""
+        changes = dict(call.data[ATTR_CHANGES])
+        try:
+            if changes.get(ATTR_EXPIRY_DATE):
+                changes[ATTR_EXPIRY_DATE] = _normalize_expiry_date(changes[ATTR_EXPIRY_DATE])
+            product_ids = _select_products(coordinator, call.data)
+        except ValueError as err:
+            return {"success": False, "error": str(err)}
+
+        results = await coordinator.async_update_products(product_ids, changes)
+
+        return {
+            "success": True,
+            "count": sum(1 for result in results if result["success"]),
+            "results": results,
+        }
+
+    async def handle_batch(call: ServiceCall) -> ServiceResponse:
+        """Handle batch service call (all operations applied at once, or none)."""
+        operations = [dict(operation) for operation in call.data[ATTR_OPERATIONS]]
+
+        for step, operation in enumerate(operations):
+            if operation.get(ATTR_EXPIRY_DATE):
+                try:
+                    operation[ATTR_EXPIRY_DATE] = _normalize_expiry_date(operation[ATTR_EXPIRY_DATE])
+                except ValueError as err:
+                    return {"success": False, "step": step, "error": str(err)}
+
+        try:
+            results = await coordinator.async_apply_batch(operations)
+        except BatchOperationError as err:
+            return {"success": False, "step": err.step, "error": str(err)}
+
+        return {
+            "success": True,
+            "count": len(results),
+            "results": results,
+        }
+
     async def handle_add_category(call: ServiceCall) -> ServiceResponse:
         """Handle add category service call."""
         name = call.data[ATTR_NAME]
@@ -504,6 +794,14 @@ async def async_setup_services(
         supports_response=SupportsResponse.OPTIONAL,
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ADD_PRODUCTS,
+        handle_add_products,
+        schema=ADD_PRODUCTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     hass.services.async_register(
         DOMAIN,
         SERVICE_REMOVE_PRODUCT,
@@ -512,6 +810,14 @@ async def async_setup_services(
         supports_response=SupportsResponse.OPTIONAL,
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_PRODUCTS,
+        handle_remove_products,
+        schema=REMOVE_PRODUCTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     hass.services.async_register(
         DOMAIN,
         SERVICE_UPDATE_QUANTITY,
@@ -536,6 +842,22 @@ async def async_setup_services(
         supports_response=SupportsResponse.OPTIONAL,
     )
 
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_UPDATE_PRODUCTS,
+        handle_update_products,
+        schema=UPDATE_PRODUCTS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_BATCH,
+        handle_batch,
+        schema=BATCH_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
     hass.services.async_register(
         DOMAIN,
         SERVICE_ADD_CATEGORY,
@@ -693,9 +1015,13 @@ async def async_unload_services(hass: HomeAssistant) -> None:
     hass.services.async_remove(DOMAIN, SERVICE_SCAN_PRODUCT)
     hass.services.async_remove(DOMAIN, SERVICE_LOOKUP_PRODUCT)
     hass.services.async_remove(DOMAIN, SERVICE_ADD_PRODUCT)
+    hass.services.async_remove(DOMAIN, SERVICE_ADD_PRODUCTS)
     hass.services.async_remove(DOMAIN, SERVICE_REMOVE_PRODUCT)
+    hass.services.async_remove(DOMAIN, SERVICE_REMOVE_PRODUCTS)
     hass.services.async_remove(DOMAIN, SERVICE_UPDATE_QUANTITY)
     hass.services.async_remove(DOMAIN, SERVICE_UPDATE_PRODUCT)
+    hass.services.async_remove(DOMAIN, SERVICE_UPDATE_PRODUCTS)
+    hass.services.async_remove(DOMAIN, SERVICE_BATCH)
     hass.services.async_remove(DOMAIN, SERVICE_LIST_PRODUCTS)
     hass.services.async_remove(DOMAIN, SERVICE_ADD_CATEGORY)
     hass.services.async_remove(DOMAIN, SERVICE_REMOVE_CATEGORY)
@@ -0,0 +1,767 @@
+"""Storage backends for Inventory Manager.
+
+- InventoryStore: per-location JSON shards + append-only journal (default)
+- SqliteInventoryStore: SQLite database with one row per product
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+
+from .const import STORAGE_JOURNAL_FILE, STORAGE_LOCATIONS
+from .models import canonical_expiry
+
+_LOGGER = logging.getLogger(__name__)
+
+SHARD_HISTORY = "history"
+# Products whose location is not a known storage location
+SHARD_OTHER = "other"
+SHARDS = [*STORAGE_LOCATIONS, SHARD_OTHER, SHARD_HISTORY]
+
+# Operations of the journal records; "snapshot" marks a full rewrite of every
+# shard (reset, import, recovery), which no other record describes
+_OP_SNAPSHOT = "snapshot"
+_RECORD_OPS = ("add", "update", "remove", "quantity", "clear", _OP_SNAPSHOT)
+
+
+def shard_for_location(location: str | None) -> str:
+    """Return the shard holding the products of a location."""
+    return location if location in STORAGE_LOCATIONS else SHARD_OTHER
+
+
+def _size(lines: list[str]) -> int:
+    """Return the encoded size of journal lines in bytes."""
+    return sum(len(line.encode("utf-8")) for line in lines)
+
+
+def _generation_path(path: Path, generation: int) -> Path:
+    """Return the path of a previous generation (0 is the current file)."""
+    return path if generation == 0 else path.with_name(f"{path.name}.{generation}")
+
+
+def _fsync_dir(path: Path) -> None:
+    """Persist a rename by syncing the parent directory (no-op where unsupported)."""
+    try:
+        fd = os.open(path.parent, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def encode_record(record: dict[str, Any]) -> str:
+    """Serialise a journal record as one compact JSON line."""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def read_state_file(path: Path) -> dict[str, Any] | None:
+    """Read a small JSON state file (None if missing or unreadable)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as err:
+        _LOGGER.warning("Ignoring unreadable state file %s: %s", path.name, err)
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def write_state_file(path: Path, content: dict[str, Any]) -> None:
+    """Write a small JSON state file atomically (no previous generations)."""
+    path.parent.mkdir(exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(content, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _empty_shard(shard: str) -> dict[str, Any]:
+    """Return the content of a shard without data."""
+    return {"product_history": []} if shard == SHARD_HISTORY else {"products": {}}
+
+
+def _split_shards(data: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Split single-file data (legacy layout) into shard contents."""
+    contents = {shard: _empty_shard(shard) for shard in SHARDS}
+    for product_id, product in data.get("products", {}).items():
+        contents[shard_for_location(product.get("location"))]["products"][product_id] = product
+    contents[SHARD_HISTORY]["product_history"] = data.get("product_history", [])
+    return contents
+
+
+def _replay_record(shard: str, content: dict[str, Any], record: dict[str, Any]) -> None:
+    """Apply a journal record to one shard, ignoring what belongs to other shards."""
+    op = record.get("op")
+    if shard == SHARD_HISTORY:
+        if "history" in record:
+            # Same order as the coordinator's history: one entry per name, newest first
+            key = record["history"].get("name", "").lower()
+            history = [
+                item for item in content["product_history"]
+                if item.get("name", "").lower() != key
+            ]
+            content["product_history"] = [record["history"], *history]
+        return
+    products = content["products"]
+    product_id = record.get("id")
+    if op in ("add", "update"):
+        if shard_for_location(record["product"].get("location")) == shard:
+            products[product_id] = record["product"]
+        else:
+            # Added to or moved to another shard
+            products.pop(product_id, None)
+    elif op == "remove":
+        products.pop(product_id, None)
+    elif op == "quantity":
+        if product_id in products:
+            products[product_id] = {**products[product_id], "quantity": record["quantity"]}
+    elif op == "clear":
+        location = record.get("location")
+        for pid in [pid for pid, p in products.items() if p.get("location") == location]:
+            del products[pid]
+
+
+class InventoryStore:
+    """Persist inventory data as per-location shard files plus a journal of mutations.
+
+    Products are split into one shard file per storage location (freezer,
+    fridge, pantry) and the history into its own shard, in the
+    `inventory_data/` directory. Each mutation is appended to the journal as
+    one JSON line, so a quantity change costs a few dozen bytes instead of a
+    full rewrite. Once the journal exceeds `max_records` lines or `max_bytes`
+    bytes, it is compacted: only the shards changed since the last compaction
+    are rewritten, atomically.
+
+    Each shard keeps `generations` previous versions (`fridge.json.1`, ...)
+    and the journal rotates at each compaction (`journal.jsonl.1`, ...).
+    Every shard rotates at each compaction, rewritten or not (an unchanged
+    shard is copied as its own new generation), so `fridge.json.N` is always
+    covered by journals N..0. If a shard is unreadable, loading falls
+    back to its newest valid generation and replays only those journals on
+    it; the other shards replay the current journal. Full rewrites (reset,
+    import) write no mutation record, so they leave a snapshot marker in the
+    journal: a generation older than a marker is reported as incomplete
+    instead of recovered.
+
+    Methods are blocking and must run in the executor, except async_load.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        legacy_path: Path,
+        max_records: int,
+        max_bytes: int,
+        generations: int,
+    ) -> None:
+        """Initialize the store."""
+        self.directory = directory
+        self.legacy_path = legacy_path
+        self.journal_path = directory / STORAGE_JOURNAL_FILE
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.generations = generations
+        self.journal_records = 0
+        self.journal_bytes = 0
+        # Oldest generation used by the last load (0 = current files, None = no data)
+        self.loaded_generation: int | None = None
+        self.shard_generations: dict[str, int | None] = {}
+        self.unreadable: list[str] = []
+        # Shards whose data could not be fully rebuilt (no valid generation,
+        # or a generation older than a full rewrite)
+        self.incomplete: list[str] = []
+        self.migrated_legacy = False
+        self.replayed_records = 0
+        self.load_duration = 0.0
+
+    def _shard_path(self, shard: str) -> Path:
+        """Return the path of a shard file."""
+        return self.directory / f"{shard}.json"
+
+    def needs_compaction(self, pending: list[str]) -> bool:
+        """Return True if appending `pending` would push the journal past a threshold."""
+        return (
+            self.journal_records + len(pending) > self.max_records
+            or self.journal_bytes + _size(pending) > self.max_bytes
+        )
+
+    async def async_load(self, hass: HomeAssistant) -> dict[str, Any] | None:
+        """Read the shards in parallel and bring each one up to date from the journals.
+
+        A shard read from generation N is covered by journals N..0 (see the
+        class docstring) and only replays those, keeping the records of its
+        own location: a shard that is newer than a kept journal never sees
+        the records it already contains, nor older ones that a full rewrite
+        (reset, import) superseded. Returns None if there is no data at all.
+        """
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *(
+                hass.async_add_executor_job(self._read_generations, self._shard_path(shard))
+                for shard in SHARDS
+            )
+        )
+        self.shard_generations = {}
+        self.unreadable = []
+        self.incomplete = []
+        self.migrated_legacy = False
+        contents: dict[str, dict[str, Any]] = {}
+        # Generation of the oldest journal each shard needs
+        replay_from: dict[str, int] = {}
+        for shard, (content, generation, unreadable) in zip(SHARDS, results):
+            self.shard_generations[shard] = generation
+            self.unreadable.extend(unreadable)
+            if content is not None:
+                contents[shard] = content
+                replay_from[shard] = generation
+            elif unreadable:
+                # No valid generation: rebuild what the kept journals hold
+                self.incomplete.append(shard)
+                replay_from[shard] = self.generations
+
+        if not contents and not self.unreadable:
+            # Single-file storage used before sharding
+            legacy, generation, unreadable = await hass.async_add_executor_job(
+                self._read_generations, self.legacy_path
+            )
+            self.unreadable.extend(unreadable)
+            if legacy is not None:
+                self.migrated_legacy = True
+                contents = _split_shards(legacy)
+                self.shard_generations = {shard: generation for shard in SHARDS}
+                replay_from = dict.fromkeys(SHARDS, generation)
+
+        loaded = [gen for gen in self.shard_generations.values() if gen is not None]
+        self.loaded_generation = max(loaded) if loaded else None
+        journals = await hass.async_add_executor_job(
+            self._read_journals, max(replay_from.values(), default=0)
+        )
+        self.replayed_records = sum(len(records) for records in journals)
+        if not contents and not self.replayed_records:
+            self.load_duration = time.monotonic() - start
+            return None
+
+        data: dict[str, Any] = {"products": {}, "product_history": []}
+        for shard in SHARDS:
+            content = contents.get(shard) or _empty_shard(shard)
+            # A missing shard never held data at a compaction: journal 0 suffices
+            for generation in range(replay_from.get(shard, 0), -1, -1):
+                for record in journals[generation]:
+                    if record["op"] != _OP_SNAPSHOT:
+                        _replay_record(shard, content, record)
+                    elif shard not in self.incomplete:
+                        # Rewritten in full after this generation: what the
+                        # rewrite changed (reset, import) is not in the journals
+                        self.incomplete.append(shard)
+            if shard == SHARD_HISTORY:
+                data["product_history"] = content.get("product_history", [])
+            else:
+                data["products"].update(content.get("products", {}))
+
+        self.load_duration = time.monotonic() - start
+        return data
+
+    def _read_generations(
+        self, path: Path
+    ) -> tuple[dict[str, Any] | None, int | None, list[str]]:
+        """Read the newest valid generation of a file."""
+        unreadable = []
+        for generation in range(self.generations + 1):
+            gen_path = _generation_path(path, generation)
+            if not gen_path.exists():
+                continue
+            try:
+                with open(gen_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict) or not isinstance(data.get("products", {}), dict):
+                    raise ValueError("unexpected content")
+            except (OSError, ValueError) as err:
+                _LOGGER.warning("Ignoring unreadable inventory file %s: %s", gen_path.name, err)
+                unreadable.append(gen_path.name)
+                continue
+            return data, generation, unreadable
+        return None, None, unreadable
+
+    def _read_journals(self, oldest: int) -> list[list[dict[str, Any]]]:
+        """Read the records of journals 0..oldest, indexed by generation."""
+        return [
+            self._read_journal(_generation_path(self.journal_path, generation))
+            for generation in range(oldest + 1)
+        ]
+
+    def _read_journal(self, path: Path) -> list[dict[str, Any]]:
+        """Read the records of one journal file; the current one updates the counters."""
+        records: list[dict[str, Any]] = []
+        current = path == self.journal_path
+        if current:
+            self.journal_records = 0
+            self.journal_bytes = 0
+        if not path.exists():
+            return records
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A crash during an append leaves a truncated last line
+                    _LOGGER.warning("Skipping unreadable record in %s", path.name)
+                    continue
+                if isinstance(record, dict) and record.get("op") in _RECORD_OPS:
+                    records.append(record)
+                else:
+                    _LOGGER.warning("Skipping unknown record in %s: %s", path.name, line.strip())
+                if current:
+                    self.journal_records += 1
+                    self.journal_bytes += len(line.encode("utf-8"))
+        return records
+
+    def append(self, lines: list[str]) -> None:
+        """Append encoded records to the journal."""
+        self.directory.mkdir(exist_ok=True)
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_records += len(lines)
+        self.journal_bytes += _size(lines)
+
+    def write_snapshot(
+        self, data: dict[str, Any], lines: list[str], shards: set[str] | None = None
+    ) -> None:
+        """Rewrite the given shards (all if None) and start a new journal.
+
+        `data` holds at least the products of the rewritten shards. `lines`
+        are records not yet in the journal; they are appended first so the
+        rotated journal contains every mutation. A full rewrite also appends
+        a snapshot marker: the previous generations cannot be brought past it.
+        """
+        if shards is None:
+            lines = [*lines, encode_record({"op": _OP_SNAPSHOT})]
+        if lines and self.generations > 0:
+            self.append(lines)
+        self.directory.mkdir(exist_ok=True)
+
+        if shards is None:
+            shards = set(SHARDS)
+        contents: dict[str, dict[str, Any]] = {
+            shard: {"products": {}} for shard in shards if shard != SHARD_HISTORY
+        }
+        for product_id, product in data.get("products", {}).items():
+            shard = shard_for_location(product.get("location"))
+            if shard in contents:
+                contents[shard]["products"][product_id] = product
+        if SHARD_HISTORY in shards:
+            contents[SHARD_HISTORY] = {"product_history": data.get("product_history", [])}
+
+        for shard in SHARDS:
+            path = self._shard_path(shard)
+            content = contents.get(shard)
+            if content is None:
+                # Unchanged: its generations still shift with the journal's
+                if path.exists():
+                    self._rotate_unchanged(path)
+                continue
+            if shard == SHARD_OTHER and not content["products"] and not path.exists():
+                continue
+            content["last_updated"] = data.get("last_updated")
+            self._write_file(path, content)
+
+        # The journal rotates at each compaction: journal.1 holds the records
+        # written before the shards above.
+        self._rotate(self.journal_path)
+        _fsync_dir(self.journal_path)
+        self.journal_records = 0
+        self.journal_bytes = 0
+
+    def _write_file(self, path: Path, content: dict[str, Any]) -> None:
+        """Write a file through a fsynced temp file, keeping previous generations."""
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(content, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        self._rotate(path)
+        os.replace(tmp_path, path)
+
+    def _rotate_unchanged(self, path: Path) -> None:
+        """Rotate a file that was not rewritten, its new version being a byte copy.
+
+        A copy rather than a hard link, so damage to one generation does not
+        reach the others; nothing is re-serialised.
+        """
+        if self.generations == 0:
+            return
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        shutil.copyfile(path, tmp_path)
+        with open(tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        self._rotate(path)
+        os.replace(tmp_path, path)
+
+    def _rotate(self, path: Path) -> None:
+        """Shift previous generations: file.N-1 -> file.N, ..., file -> file.1."""
+        if self.generations == 0:
+            path.unlink(missing_ok=True)
+            return
+        for generation in range(self.generations - 1, -1, -1):
+            source = _generation_path(path, generation)
+            target = _generation_path(path, generation + 1)
+            if source.exists():
+                os.replace(source, target)
+            else:
+                # Keep each journal paired with the compaction it precedes
+                target.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        """Release resources (nothing to do for files)."""
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id TEXT PRIMARY KEY,
+    location TEXT,
+    category TEXT,
+    zone TEXT,
+    barcode TEXT,
+    expiry_date TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_products_location_category ON products (location, category);
+CREATE INDEX IF NOT EXISTS idx_products_location_zone ON products (location, zone);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products (category);
+CREATE INDEX IF NOT EXISTS idx_products_zone ON products (zone);
+CREATE INDEX IF NOT EXISTS idx_products_expiry_date ON products (expiry_date);
+CREATE INDEX IF NOT EXISTS idx_products_barcode ON products (barcode);
+CREATE TABLE IF NOT EXISTS history (
+    key TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_seq ON history (seq);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Sort keys of query_products: SQL expression and value standing for a missing one
+_SORT_COLUMNS: dict[str, tuple[str, Any]] = {
+    "expiry_date": ("expiry_date", ""),
+    # casefold() is registered on the connection: same order as the in-memory sort
+    "name": ("casefold(json_extract(data, '$.name'))", ""),
+    "added_date": ("json_extract(data, '$.added_date')", ""),
+    "quantity": ("json_extract(data, '$.quantity')", 0),
+}
+
+# Marks a database that has been populated (from scratch or from the JSON file)
+_META_INITIALIZED = "initialized"
+
+# PRAGMA user_version; 1: expiry_date column holds canonical YYYY-MM-DD dates
+_SCHEMA_VERSION = 1
+
+
+def _casefold(value: Any) -> str | None:
+    """Fold a name like the in-memory filters and sort (SQL function casefold)."""
+    return None if value is None else str(value).casefold()
+
+
+def _product_row(product_id: str, product: dict[str, Any]) -> tuple:
+    """Return the products table row for a product."""
+    return (
+        product_id,
+        product.get("location"),
+        product.get("category"),
+        product.get("zone"),
+        product.get("barcode"),
+        # Canonical so that SQL comparisons match parsed dates (NULL if invalid)
+        canonical_expiry(product.get("expiry_date")),
+        json.dumps(product, ensure_ascii=False),
+    )
+
+
+class SqliteInventoryStore:
+    """Persist inventory data in a SQLite database.
+
+    Products are stored one row per product with indexed location, category,
+    zone, barcode and expiry_date columns, so each mutation record becomes a
+    single-row INSERT/UPDATE/DELETE and queries can filter and sort in SQL.
+    It accepts the same mutation records as the JSON journal.
+
+    Methods are blocking and must run in the executor, except async_load.
+    """
+
+    def __init__(self, db_path: Path, history_size: int) -> None:
+        """Initialize the store."""
+        self.db_path = db_path
+        # Updated by the coordinator when the option changes
+        self.history_size = history_size
+        self._conn: sqlite3.Connection | None = None
+        # Executor threads share one connection
+        self._lock = threading.Lock()
+        self.journal_records = 0
+        self.journal_bytes = 0
+        self.loaded_generation: int | None = None
+        self.shard_generations: dict[str, int | None] = {}
+        self.unreadable: list[str] = []
+        self.incomplete: list[str] = []
+        self.migrated_legacy = False
+        self.replayed_records = 0
+        self.load_duration = 0.0
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        """Return the connection, creating the schema on first use."""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.create_function("casefold", 1, _casefold, deterministic=True)
+            self._conn.executescript(_SQLITE_SCHEMA)
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < _SCHEMA_VERSION:
+                self._migrate(self._conn)
+        return self._conn
+
+    @staticmethod
+    def _migrate(db: sqlite3.Connection) -> None:
+        """Rewrite the expiry_date column of rows written by an older version."""
+        rows = [
+            (canonical_expiry(json.loads(data).get("expiry_date")), product_id)
+            for product_id, data in db.execute("SELECT id, data FROM products")
+        ]
+        with db:
+            db.executemany("UPDATE products SET expiry_date = ? WHERE id = ?", rows)
+            db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+
+    def is_initialized(self) -> bool:
+        """Return True once the database holds inventory data (possibly empty)."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM meta WHERE key = ?", (_META_INITIALIZED,)
+            ).fetchone()
+        return row is not None
+
+    def needs_compaction(self, pending: list[str]) -> bool:
+        """Return False: rows are updated in place, there is nothing to compact."""
+        return False
+
+    async def async_load(self, hass: HomeAssistant) -> dict[str, Any] | None:
+        """Read all products and the history."""
+        return await hass.async_add_executor_job(self.load)
+
+    def load(self) -> dict[str, Any] | None:
+        """Read all products and the history."""
+        start = time.monotonic()
+        with self._lock:
+            db = self._db
+            products = {
+                product_id: json.loads(data)
+                for product_id, data in db.execute("SELECT id, data FROM products")
+            }
+            history = [
+                json.loads(data)
+                for (data,) in db.execute("SELECT data FROM history ORDER BY seq DESC")
+            ]
+        self.loaded_generation = 0
+        self.load_duration = time.monotonic() - start
+        return {"products": products, "product_history": history}
+
+    def append(self, lines: list[str]) -> None:
+        """Apply encoded mutation records as row-level statements in one transaction."""
+        with self._lock, self._db as db:
+            for line in lines:
+                self._apply(db, json.loads(line))
+
+    def _apply(self, db: sqlite3.Connection, record: dict[str, Any]) -> None:
+        """Apply one mutation record."""
+        op = record.get("op")
+        product_id = record.get("id")
+        if op in ("add", "update"):
+            db.execute(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?, ?, ?)",
+                _product_row(product_id, record["product"]),
+            )
+            if "history" in record:
+                self._push_history(db, record["history"])
+        elif op == "remove":
+            db.execute("DELETE FROM products WHERE id = ?", (product_id,))
+        elif op == "quantity":
+            row = db.execute("SELECT data FROM products WHERE id = ?", (product_id,)).fetchone()
+            if row is not None:
+                product = json.loads(row[0])
+                product["quantity"] = record["quantity"]
+                db.execute(
+                    "UPDATE products SET data = ? WHERE id = ?",
+                    (json.dumps(product, ensure_ascii=False), product_id),
+                )
+        elif op == "clear":
+            db.execute("DELETE FROM products WHERE location = ?", (record.get("location"),))
+        else:
+            _LOGGER.warning("Unknown mutation record: %s", op)
+
+    def _push_history(self, db: sqlite3.Connection, history_item: dict[str, Any]) -> None:
+        """Put a history item first and keep the last `history_size`."""
+        db.execute(
+            "INSERT OR REPLACE INTO history VALUES "
+            "(?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM history), ?)",
+            (
+                history_item.get("name", "").lower(),
+                json.dumps(history_item, ensure_ascii=False),
+            ),
+        )
+        db.execute(
+            "DELETE FROM history WHERE seq <= "
+            "(SELECT seq FROM history ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+            (self.history_size,),
+        )
+
+    def write_snapshot(
+        self, data: dict[str, Any], lines: list[str], shards: set[str] | None = None
+    ) -> None:
+        """Replace all rows with the full data (import, reset, migration).
+
+        Rows are updated in place otherwise, so this is only called with the
+        full data (`shards` is None).
+        """
+        history = data.get("product_history", [])
+        with self._lock, self._db as db:
+            db.execute("DELETE FROM products")
+            db.executemany(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [_product_row(pid, product) for pid, product in data.get("products", {}).items()],
+            )
+            db.execute("DELETE FROM history")
+            db.executemany(
+                "INSERT OR IGNORE INTO history VALUES (?, ?, ?)",
+                [
+                    (item.get("name", "").lower(), len(history) - idx, json.dumps(item, ensure_ascii=False))
+                    for idx, item in enumerate(history)
+                ],
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                (_META_INITIALIZED, data.get("last_updated", "")),
+            )
+
+    @staticmethod
+    def _product_filters(
+        location: str | None,
+        category: str | None,
+        zone: str | None,
+        barcode: str | None,
+        expiry_from: str | None,
+        expiry_to: str | None,
+        name: str | None,
+    ) -> tuple[list[str], list[Any]]:
+        """Return the WHERE clauses and parameters of a products query."""
+        clauses = []
+        params: list[Any] = []
+        for column, value in (
+            ("location", location),
+            ("category", category),
+            ("zone", zone),
+            ("barcode", barcode),
+        ):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        # The column holds canonical dates: bind the bounds in the same form
+        if expiry_from is not None:
+            clauses.append("expiry_date >= ?")
+            params.append(canonical_expiry(expiry_from))
+        if expiry_to is not None:
+            clauses.append("expiry_date <= ?")
+            params.append(canonical_expiry(expiry_to))
+        if name is not None:
+            # SQLite's lower() and NOCASE only fold ASCII ("É" != "é")
+            clauses.append("instr(COALESCE(casefold(json_extract(data, '$.name')), ''), ?) > 0")
+            params.append(name.casefold())
+        return clauses, params
+
+    def count_products(
+        self,
+        location: str | None = None,
+        category: str | None = None,
+        zone: str | None = None,
+        barcode: str | None = None,
+        expiry_from: str | None = None,
+        expiry_to: str | None = None,
+        name: str | None = None,
+    ) -> int:
+        """Return the number of matching products (same filters as query_products)."""
+        clauses, params = self._product_filters(
+            location, category, zone, barcode, expiry_from, expiry_to, name
+        )
+        sql = "SELECT COUNT(*) FROM products"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            return self._db.execute(sql, params).fetchone()[0]
+
+    def query_products(
+        self,
+        location: str | None = None,
+        category: str | None = None,
+        zone: str | None = None,
+        barcode: str | None = None,
+        expiry_from: str | None = None,
+        expiry_to: str | None = None,
+        name: str | None = None,
+        sort_by: str = "expiry_date",
+        descending: bool = False,
+        limit: int | None = None,
+        offset: int = 0,
+        after: tuple[Any, str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Return matching products ({"id": ..., **product}), sorted.
+
+        Products without a value for `sort_by` come last (first when
+        `descending`); products without a valid expiry date never match an expiry
+        range. `name` matches a substring, case-insensitively. `after` is the
+        (sort value, ID) of the last product of the previous page (keyset
+        pagination, used instead of `offset`).
+        """
+        clauses, params = self._product_filters(
+            location, category, zone, barcode, expiry_from, expiry_to, name
+        )
+        column, default = _SORT_COLUMNS[sort_by]
+        key = (f"{column} IS NULL", f"COALESCE({column}, {default!r})", "id")
+        if after is not None:
+            value, product_id = after
+            operator = "<" if descending else ">"
+            clauses.append(f"({', '.join(key)}) {operator} (?, ?, ?)")
+            if sort_by == "name":
+                value = _casefold(value)
+            params.extend([value is None, default if value is None else value, product_id])
+        sql = "SELECT id, data FROM products"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        direction = " DESC" if descending else ""
+        sql += " ORDER BY " + ", ".join(part + direction for part in key)
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [{"id": product_id, **json.loads(data)} for product_id, data in rows]
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,122 @@
+"""Tests for product queries, which must not depend on the storage backend."""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.inventory_manager.const import (
+    CONF_STORAGE_BACKEND,
+    DOMAIN,
+    STORAGE_BACKEND_JSON,
+    STORAGE_BACKEND_SQLITE,
+)
+from custom_components.inventory_manager.coordinator import InventoryCoordinator
+
+NAMES = ["École", "éclair", "Eclair", "Œuf", "œuf frais", "Straße", "zèbre", "Abricot", "ZOO"]
+
+
+async def _query_names(
+    hass: HomeAssistant, config_dir: Path, backend: str, **query: Any
+) -> list[str]:
+    """Return the product names of every page of a query on a fresh inventory."""
+    config_dir.mkdir()
+    hass.config.config_dir = str(config_dir)
+    entry = MockConfigEntry(domain=DOMAIN, options={CONF_STORAGE_BACKEND: backend})
+    coordinator = InventoryCoordinator(hass, entry)
+    await coordinator.async_load_data()
+    for name in NAMES:
+        await coordinator.async_add_product(name, location="pantry")
+    # Saved: SQLite answers in SQL (pending changes are answered from memory)
+    await coordinator.async_flush()
+
+    names: list[str] = []
+    cursor = None
+    while True:
+        page = await coordinator.async_query_products(limit=2, cursor=cursor, **query)
+        names.extend(product["name"] for product in page["products"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    await coordinator.async_close()
+    return names
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"sort_by": "name"},
+        {"sort_by": "name", "descending": True},
+        {"sort_by": "name", "name": "é"},
+        {"sort_by": "name", "name": "œuf"},
+        {"sort_by": "name", "name": "STRASSE"},
+    ],
+)
+async def test_name_queries_match_between_backends(
+    hass: HomeAssistant, tmp_path: Path, query: dict[str, Any]
+) -> None:
+    """Name filters and sort fold case (accents included) the same way on both backends."""
+    in_memory = await _query_names(hass, tmp_path / "json", STORAGE_BACKEND_JSON, **query)
+    sqlite = await _query_names(hass, tmp_path / "sqlite", STORAGE_BACKEND_SQLITE, **query)
+
+    assert in_memory == sqlite
+    if "name" in query:
+        assert in_memory
+
+
+async def test_name_filter_folds_accented_capitals(hass: HomeAssistant, tmp_path: Path) -> None:
+    """'é' matches 'École' with SQLite too."""
+    names = await _query_names(
+        hass, tmp_path / "sqlite", STORAGE_BACKEND_SQLITE, sort_by="name", name="é"
+    )
+
+    assert names == ["éclair", "École"]
+
+
+async def test_sqlite_query_does_not_force_a_save(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Changes waiting for the write-behind save are listed without writing them."""
+    hass.config.config_dir = str(tmp_path)
+    entry = MockConfigEntry(domain=DOMAIN, options={CONF_STORAGE_BACKEND: STORAGE_BACKEND_SQLITE})
+    coordinator = InventoryCoordinator(hass, entry)
+    await coordinator.async_load_data()
+    product_id = await coordinator.async_add_product("Yaourt", location="fridge")
+
+    page = await coordinator.async_query_products(location="fridge")
+
+    assert [product["id"] for product in page["products"]] == [product_id]
+    assert coordinator.save_stats["written"] == 0
+    await coordinator.async_flush()
+    await coordinator.async_close()
+
+
+async def test_next_to_expire_pages_match_full_sort(hass: HomeAssistant, tmp_path: Path) -> None:
+    """Pages read from the expiry index match the fully sorted list, undated products last."""
+    hass.config.config_dir = str(tmp_path)
+    coordinator = InventoryCoordinator(hass, MockConfigEntry(domain=DOMAIN))
+    await coordinator.async_load_data()
+    for day in (5, 1, 9, 1, 3, None, 7, None, 2):
+        expiry = None if day is None else f"2031-01-{day:02d}"
+        await coordinator.async_add_product(f"P{day}", expiry, location="fridge")
+    await coordinator.async_add_product("Autre", "2031-01-04", location="pantry")
+
+    for query in ({}, {"location": "fridge"}, {"expiry_from": "2031-01-02", "expiry_to": "2031-01-07"}):
+        full = await coordinator.async_query_products(**query)
+        ids: list[str] = []
+        cursor = None
+        while True:
+            page = await coordinator.async_query_products(limit=3, cursor=cursor, **query)
+            assert page["total"] == full["total"]
+            ids.extend(product["id"] for product in page["products"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert ids == [product["id"] for product in full["products"]]
+        offset_page = await coordinator.async_query_products(limit=2, offset=3, **query)
+        assert [p["id"] for p in offset_page["products"]] == ids[3:5]
+
+    await coordinator.async_flush()
+    await coordinator.async_close()
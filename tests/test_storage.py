@@ -0,0 +1,125 @@
+"""Tests for the JSON inventory store (shards, journal and generations)."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.inventory_manager.const import DOMAIN
+from custom_components.inventory_manager.coordinator import InventoryCoordinator
+from custom_components.inventory_manager.storage import InventoryStore, encode_record
+
+
+def _store(config_dir: Path) -> InventoryStore:
+    """Return a store keeping 3 generations."""
+    return InventoryStore(
+        config_dir / "inventory_data",
+        config_dir / "inventory_data.json",
+        max_records=1000,
+        max_bytes=512 * 1024,
+        generations=3,
+    )
+
+
+def _product(name: str, location: str) -> dict:
+    """Return a stored product."""
+    return {"name": name, "location": location, "quantity": 1}
+
+
+async def test_recovery_does_not_replay_older_journals_on_readable_shards(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """A product removed by a full rewrite does not come back from an older journal."""
+    store = _store(tmp_path)
+
+    def write() -> None:
+        store.write_snapshot({"products": {"x": _product("Poisson", "freezer")}}, [])
+        store.append([encode_record({"op": "add", "id": "z", "product": _product("Lait", "fridge")})])
+        # Reset: the products are rewritten without a journal record
+        store.write_snapshot({"products": {}, "product_history": []}, [])
+        (store.directory / "freezer.json").write_text("{", encoding="utf-8")
+
+    await hass.async_add_executor_job(write)
+    data = await store.async_load(hass)
+
+    assert store.unreadable == ["freezer.json"]
+    assert store.shard_generations["fridge"] == 0
+    assert "z" not in data["products"]
+
+
+async def test_recovered_shard_replays_only_its_journals(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """A shard read from an older generation gets the later changes of its location."""
+    store = _store(tmp_path)
+
+    def write() -> None:
+        store.write_snapshot(
+            {"products": {"a": _product("Yaourt", "fridge"), "b": _product("Beurre", "fridge")}}, []
+        )
+        # Moved to the pantry, then a compaction of the changed shards only
+        moved = _product("Yaourt", "pantry")
+        store.write_snapshot(
+            {"products": {"a": moved, "b": _product("Beurre", "fridge")}},
+            [encode_record({"op": "update", "id": "a", "product": moved})],
+            {"fridge", "pantry"},
+        )
+        store.append([encode_record({"op": "quantity", "id": "b", "quantity": 3})])
+        (store.directory / "fridge.json").write_text("{", encoding="utf-8")
+
+    await hass.async_add_executor_job(write)
+    data = await store.async_load(hass)
+
+    assert store.shard_generations["fridge"] == 1
+    assert data["products"]["a"]["location"] == "pantry"
+    assert data["products"]["b"]["quantity"] == 3
+    assert len(data["products"]) == 2
+
+
+async def test_generation_older_than_full_rewrite_is_incomplete(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """A shard only readable from before a reset is reported, not silently recovered."""
+    store = _store(tmp_path)
+
+    def write() -> None:
+        store.write_snapshot({"products": {"x": _product("Poisson", "freezer")}}, [])
+        store.append([encode_record({"op": "add", "id": "y", "product": _product("Pain", "pantry")})])
+        store.write_snapshot({"products": {"y": _product("Pain", "pantry")}}, [], {"pantry"})
+        # Reset, then a change to another shard
+        store.write_snapshot({"products": {}, "product_history": []}, [])
+        store.write_snapshot(
+            {"products": {"z": _product("Lait", "fridge")}},
+            [encode_record({"op": "add", "id": "z", "product": _product("Lait", "fridge")})],
+            {"fridge"},
+        )
+        for generation in ("", ".1"):
+            (store.directory / f"freezer.json{generation}").write_text("{", encoding="utf-8")
+
+    await hass.async_add_executor_job(write)
+    data = await store.async_load(hass)
+
+    assert store.shard_generations["freezer"] == 2
+    assert store.incomplete == ["freezer"]
+    assert store.shard_generations["pantry"] == 0
+    assert "y" not in data["products"]
+    assert "z" in data["products"]
+
+
+async def test_save_without_changes_is_not_counted_as_a_write(
+    hass: HomeAssistant, tmp_path: Path
+) -> None:
+    """Only a journal append or a snapshot rewrite counts as a write."""
+    hass.config.config_dir = str(tmp_path)
+    coordinator = InventoryCoordinator(hass, MockConfigEntry(domain=DOMAIN))
+    await coordinator.async_load_data()
+    await coordinator.async_add_product("Yaourt", location="fridge")
+    await coordinator.async_flush()
+    written = coordinator.save_stats["written"]
+
+    await coordinator.async_save_data()
+
+    assert written == 1
+    assert coordinator.save_stats["written"] == written